@@ -0,0 +1,142 @@
+from datetime import datetime
+
+from flask import Blueprint, current_app, jsonify, request
+
+from app import db
+from models import Venue, Artist, Show
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+#----------------------------------------------------------------------------#
+# Resources.
+#----------------------------------------------------------------------------#
+
+RESOURCES = {
+    'venues': (Venue, (
+        'id', 'name', 'genres', 'address', 'city', 'state', 'phone', 'website',
+        'facebook_link', 'seeking_talent', 'seeking_description', 'image_link',
+        'upcoming_shows_count', 'next_show_at'
+    )),
+    'artists': (Artist, (
+        'id', 'name', 'genres', 'city', 'state', 'phone', 'website',
+        'facebook_link', 'seeking_venue', 'seeking_description', 'image_link',
+        'upcoming_shows_count', 'next_show_at'
+    )),
+    'shows': (Show, (
+        'id', 'venue_id', 'artist_id', 'starttime'
+    )),
+}
+
+class ApiError(Exception):
+
+    def __init__(self, message, status=400):
+        super(ApiError, self).__init__(message)
+        self.message = message
+        self.status = status
+
+@api.errorhandler(ApiError)
+def api_error(error):
+    return jsonify({'error': error.message}), error.status
+
+def _int_list(value, name):
+    try:
+        return [int(item) for item in value.split(',') if item]
+    except ValueError:
+        raise ApiError('{} must be a comma separated list of integers'.format(name))
+
+def _int_arg(name, default=None):
+    try:
+        return int(request.args.get(name, default))
+    except (TypeError, ValueError):
+        raise ApiError('{} must be an integer'.format(name))
+
+def _serialize(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+#----------------------------------------------------------------------------#
+# Controllers.
+#----------------------------------------------------------------------------#
+
+@api.route('/<resource>')
+def list_resource(resource):
+    """List venues, artists or shows.
+
+    ?fields=id,name   sparse fieldset (defaults to every field)
+    ?ids=1,2,3        batch fetch by id, in one query
+    ?cursor=<id>      resume after the last id of the previous page
+    ?limit=<n>        page size, capped at API_MAX_PAGE_SIZE
+    """
+    if resource not in RESOURCES:
+        raise ApiError('Unknown resource {!r}'.format(resource), 404)
+    model, all_fields = RESOURCES[resource]
+
+    fields = all_fields
+    if request.args.get('fields'):
+        fields = tuple(request.args['fields'].split(','))
+        unknown = [field for field in fields if field not in all_fields]
+        if unknown:
+            raise ApiError('Unknown fields: {}'.format(', '.join(unknown)))
+
+    max_limit = current_app.config['API_MAX_PAGE_SIZE']
+    limit = max(1, min(_int_arg('limit', current_app.config['API_PAGE_SIZE']), max_limit))
+
+    # The id is always selected so the page can be cursored.
+    query = db.session.query(model.id, *[getattr(model, field) for field in fields])
+
+    if 'ids' in request.args:
+        ids = _int_list(request.args['ids'], 'ids')
+        if len(ids) > max_limit:
+            raise ApiError('At most {} ids can be fetched at once'.format(max_limit))
+        query = query.filter(model.id.in_(ids))
+    if request.args.get('cursor'):
+        query = query.filter(model.id > _int_arg('cursor'))
+
+    rows = query.order_by(model.id).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1][0]
+
+    return jsonify({
+        'data': [
+            {field: _serialize(value) for field, value in zip(fields, row[1:])}
+            for row in rows
+        ],
+        'next_cursor': next_cursor
+    })
+
+@api.route('/shows', methods=['POST'])
+def book_show_endpoint():
+    """Book a show from a JSON body {artist_id, venue_id, start_time}.
+
+    201 with the new show, 409 when the venue or artist is already booked
+    within SHOW_BOOKING_WINDOW_MINUTES, 400 for invalid input.
+    """
+    from app import show_booked
+    from booking import BookingConflict, BookingError, book_show
+
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        raise ApiError('body must be a JSON object')
+    try:
+        show = book_show(body.get('artist_id'), body.get('venue_id'), body.get('start_time'),
+            window_minutes=current_app.config['SHOW_BOOKING_WINDOW_MINUTES'])
+        data = {
+            'id': show.id,
+            'venue_id': show.venue_id,
+            'artist_id': show.artist_id,
+            'starttime': _serialize(show.starttime)
+        }
+        db.session.commit()
+    except BookingConflict as conflict:
+        db.session.rollback()
+        return jsonify({'error': str(conflict), 'conflicting_show_id': conflict.show_id}), 409
+    except BookingError as error:
+        db.session.rollback()
+        raise ApiError(str(error))
+
+    show_booked(data['venue_id'], data['artist_id'])
+    return jsonify({'data': data}), 201
@@ -2,18 +2,25 @@
 # Imports
 #----------------------------------------------------------------------------#
 
+import io
 import json
+from datetime import datetime, timedelta
 import dateutil.parser
 import babel
-from flask import Flask, render_template, request, Response, flash, redirect, url_for, abort, jsonify
+from babel import Locale
+from babel.dates import parse_pattern
+from functools import lru_cache
+from flask import Flask, render_template, request, Response, flash, redirect, url_for, abort, jsonify, stream_with_context
 from flask_moment import Moment
-from flask_sqlalchemy import SQLAlchemy
 import logging
 from logging import Formatter, FileHandler
 from flask_wtf import Form
 from forms import *
 from flask_migrate import Migrate
+from replicas import RoutingSQLAlchemy
+from sqlalchemy.exc import SQLAlchemyError
 import sys
+import click
 
 #----------------------------------------------------------------------------#
 # App Config.
@@ -22,34 +29,153 @@ import sys
 app = Flask(__name__)
 moment = Moment(app)
 app.config.from_object('config')
-db = SQLAlchemy(app)
+db = RoutingSQLAlchemy(app)
 
 migrate = Migrate(app, db)
 
+#----------------------------------------------------------------------------#
+# Connection pool.
+#----------------------------------------------------------------------------#
+
+from pool import pool_status, set_transaction_statement_timeout
+
+if app.config['DB_PGBOUNCER'] and app.config['DB_STATEMENT_TIMEOUT']:
+  for engine in [db.engine] + db.replicas.engines:
+    set_transaction_statement_timeout(engine, app.config['DB_STATEMENT_TIMEOUT'])
+
+#----------------------------------------------------------------------------#
+# Instrumentation.
+#----------------------------------------------------------------------------#
+
+from instrumentation import Instrumentation
+
+instrumentation = Instrumentation(app)
+
 #----------------------------------------------------------------------------#
 # Models.
 #----------------------------------------------------------------------------#
 
 from models import *
 
+#----------------------------------------------------------------------------#
+# Queries.
+#----------------------------------------------------------------------------#
+
+from queries import *
+from search import *
+from facets import genre_criteria, genre_facets
+from counters import refresh_show_counters, roll_forward, counter_drift
+from booking import BookingError, book_show
+
+#----------------------------------------------------------------------------#
+# Cache.
+#----------------------------------------------------------------------------#
+
+from cache import make_cache, get_or_set
+from pagecache import PageCache, make_data_version
+
+cache = make_cache(app.config)
+page_cache = PageCache(make_data_version(app.config), app.config['PAGE_CACHE_MAX_ENTRIES'],
+  app.config['PAGE_CACHE_TTL'])
+
+def venue_cache_key(venue_id):
+  return 'venue:{}'.format(venue_id)
+
+def artist_cache_key(artist_id):
+  return 'artist:{}'.format(artist_id)
+
+def read_from_primary():
+  # A lagging replica may still return the row as it was before a write;
+  # cached, that would outlive the write's invalidation for CACHE_TTL.
+  return not db.session().read_from_replica
+
+def invalidate_venue(venue_id, artist_ids=()):
+  cache.delete(venue_cache_key(venue_id), *[artist_cache_key(artist_id) for artist_id in artist_ids])
+  listing_snapshots.touch('venues', venue_id)
+  listing_snapshots.touch('artists', *artist_ids)
+
+def invalidate_artist(artist_id, venue_ids=()):
+  cache.delete(artist_cache_key(artist_id), *[venue_cache_key(venue_id) for venue_id in venue_ids])
+  listing_snapshots.touch('artists', artist_id)
+  listing_snapshots.touch('venues', *venue_ids)
+
+def show_booked(venue_id, artist_id):
+  invalidate_venue(venue_id)
+  invalidate_artist(artist_id)
+
+#----------------------------------------------------------------------------#
+# Listing snapshots.
+#----------------------------------------------------------------------------#
+
+from snapshots import (ListingSnapshot, SnapshotRefresher, build_artist_listing,
+  build_venue_listing, load_artist_rows, load_venue_rows)
+
+# Unfiltered /venues and /artists are served from these. Writes touch them
+# and the page cache is bumped once the refresh is done, so no page is
+# rendered again from the snapshot the write made stale.
+listing_snapshots = SnapshotRefresher(app, {
+  'venues': ListingSnapshot(load_venue_rows, build_venue_listing),
+  'artists': ListingSnapshot(load_artist_rows, build_artist_listing),
+}, max_age=app.config['SNAPSHOT_MAX_AGE'], on_change=page_cache.bump)
+
+#----------------------------------------------------------------------------#
+# Autocomplete.
+#----------------------------------------------------------------------------#
+
+from autocomplete import Autocomplete
+
+autocomplete = Autocomplete(app, {
+  'venue': lambda: db.session.query(Venue.id, Venue.name).all(),
+  'artist': lambda: db.session.query(Artist.id, Artist.name).all(),
+}, max_age=app.config['AUTOCOMPLETE_MAX_AGE'])
+
+#----------------------------------------------------------------------------#
+# API.
+#----------------------------------------------------------------------------#
+
+from api import api
+
+app.register_blueprint(api)
+
 #----------------------------------------------------------------------------#
 # Filters.
 #----------------------------------------------------------------------------#
 
-def format_datetime(value, format='medium'):
-  date = dateutil.parser.parse(value)
-  if format == 'full':
-      format="EEEE MMMM, d, y 'at' h:mma"
-  elif format == 'medium':
-      format="EE MM, dd, y h:mma"
-  return babel.dates.format_datetime(date, format, locale='en')
+DATETIME_FORMATS = {
+  'full': "EEEE MMMM, d, y 'at' h:mma",
+  'medium': "EE MM, dd, y h:mma"
+}
+
+@lru_cache(maxsize=None)
+def compiled_datetime_format(format, locale):
+  return parse_pattern(DATETIME_FORMATS.get(format, format)), Locale.parse(locale)
+
+def format_datetime(value, format='medium', locale='en'):
+  if not isinstance(value, datetime):
+    value = dateutil.parser.parse(value)
+  pattern, locale = compiled_datetime_format(format, locale)
+  return pattern.apply(value, locale)
 
 app.jinja_env.filters['datetime'] = format_datetime
 
+#----------------------------------------------------------------------------#
+# Assets.
+#----------------------------------------------------------------------------#
+
+from assets import Assets, build as build_assets
+
+assets = Assets(app)
+
 #----------------------------------------------------------------------------#
 # Controllers.
 #----------------------------------------------------------------------------#
 
+def genre_filter(model):
+  # ?genre= may repeat; ?match=any keeps rows with any of them instead of all.
+  genres = request.values.getlist('genre')
+  match = 'any' if request.values.get('match') == 'any' else 'all'
+  return genres, match, genre_criteria(model, genres, match)
+
 @app.route('/')
 def index():
   return render_template('pages/home.html')
@@ -61,56 +187,49 @@ def index():
 #  Venues - LIST
 #  ----------------------------------------------------------------
 @app.route('/venues')
+@page_cache.cached
 def venues():
 
-  areas = Venue.query.distinct('city','state').all()
-  data = []
-
-  for area in areas:
-        area_venues = Venue.query.filter(Venue.city == area.city, Venue.state == area.state).all()
-        venue_data = []
-
-        for venue in area_venues:
-              record={
-                'id': venue.id,
-                'name': venue.name,
-                'num_upcoming_shows': len(db.session.query(Show).filter(Show.venue_id == venue.id).filter(Show.starttime > datetime.now()).all())
-              } 
-              venue_data.append(record)
+  genres, match, criteria = genre_filter(Venue)
+  snapshot = None if genres else listing_snapshots.get('venues')
 
-        data.append({
-          "city": area.city,
-          "state": area.state,
-          "venues": venue_data
-        })
+  if snapshot:
+    data, facets = snapshot.payload
+  else:
+    data, facets = venue_areas(criteria), genre_facets(Venue, criteria)
 
-  return render_template('pages/venues.html', areas=data);
+  return render_template('pages/venues.html', areas=data,
+    facets=facets, selected_genres=genres, match=match, facet_args={})
 
 #----------------------------------------------------------------------------#
 #  Venues - search
 #  ----------------------------------------------------------------
-@app.route('/venues/search', methods=['POST'])
+@app.route('/venues/search', methods=['GET', 'POST'])
 def search_venues():
 
-  search_term = request.form.get('search_term','')
-  search_results = db.session.query(Venue).filter(Venue.name.ilike(f"%{search_term}%")).all()
+  search_term = request.values.get('search_term','')
+  genres, match, criteria = genre_filter(Venue)
+  count, search_results = search_entities(Venue, search_term, app.config['SEARCH_MAX_RESULTS'], criteria)
 
   data = []
 
-  for search in search_results:
+  for search_id, search_name, num_upcoming_shows in search_results:
         record ={
-          "id": search.id,
-          "name": search.name,
-          "num_upcomig_shows": len(db.session.query(Show).filter(Show.venue_id == Venue.id).filter(Show.starttime > datetime.now()).all())
+          "id": search_id,
+          "name": search_name,
+          "num_upcoming_shows": num_upcoming_shows
         }
         data.append(record)
   
   response={
-    "count": len(search_results),
+    "count": count,
     "data": data
   }
 
-  return render_template('pages/search_venues.html', results=response, search_term=request.form.get('search_term', ''))
+  facets = genre_facets(Venue, search_criteria(Venue, search_term)[0] + criteria)
+
+  return render_template('pages/search_venues.html', results=response, search_term=search_term,
+    facets=facets, selected_genres=genres, match=match, facet_args={'search_term': search_term})
 
 #----------------------------------------------------------------------------#
 #  Venues - show_venue(venue_id)
@@ -118,53 +237,11 @@ def search_venues():
 @app.route('/venues/<int:venue_id>')
 def show_venue(venue_id):
 
-  venue = Venue.query.get(venue_id)
+  data = get_or_set(cache, venue_cache_key(venue_id), lambda: venue_detail(venue_id), read_from_primary)
 
-  if not venue:
+  if not data:
       return render_template('errors/404.html'), 404
 
-  past_shows = []
-  upcoming_shows = []
-
-  past_shows_results = db.session.query(Show).join(Artist).filter(Show.venue_id == venue_id).filter(Show.starttime < datetime.now()).all()
-  for show in past_shows_results:
-        record = {
-          "artist_id": show.artist.id,
-          "artist_name": show.artist.name,
-          "artist_image_link": show.artist.image_link,
-          "start_time": show.starttime.strftime('%Y-%m-%d %H:%M:%S')
-        }
-        past_shows.append(record)
-
-  upcoming_shows_results = db.session.query(Show).join(Artist).filter(Show.venue_id == venue_id).filter(Show.starttime > datetime.now()).all()
-  for show in upcoming_shows_results:
-        record = {
-          "artist_id": show.artist.id,
-          "artist_name": show.artist.name,
-          "artist_image_link": show.artist.image_link,
-          "start_time": show.starttime.strftime('%Y-%m-%d %H:%M:%S')
-        }
-        upcoming_shows.append(record)
-
-  data = {
-    "id": venue.id,
-    "name": venue.name,
-    "genres": venue.genres,
-    "address": venue.address,
-    "city": venue.city,
-    "state": venue.state,
-    "phone": venue.phone,
-    "website": venue.website,
-    "facebook_link": venue.facebook_link,
-    "seeking_talent": venue.seeking_talent,
-    "seeking_description": venue.seeking_description,
-    "image_link": venue.image_link,
-    "past_shows": past_shows,
-    "upcoming_shows": upcoming_shows,
-    "past_shows_count": len(past_shows),
-    "upcoming_shows_count": len(upcoming_shows),   
-  }
-  
   return render_template('pages/show_venue.html', venue=data)
 
 #-----------------------------------------------------------------
@@ -200,13 +277,15 @@ def create_venue_submission():
       seeking_description = request.form['seeking_description']
     )
     db.session.add(venue)
+    db.session.flush()
+    venue_id = venue.id
     db.session.commit()
+    listing_snapshots.touch('venues', venue_id)
+    autocomplete.add('venue', venue_id, request.form['name'])
   except:
     error = True
     db.session.rollback()
     print(sys.exc_info()) 
-  finally:
-    db.session.close()
     
   if error:
     flash(f'An error occurred. Venue ' + request.form['name'] + ' could not be listed.')
@@ -226,21 +305,27 @@ def delete_venue(venue_id):
   # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
 
   error = False
-  venue = Venue.query.get(venue_id)
+  venue = Venue.query.options(*Venue.profile('delete')).get(venue_id)
+  if not venue:
+    abort(404)
+  venue_name = venue.name
 
   try:
+    artist_ids = show_partner_ids(Show.venue_id, Show.artist_id, venue_id)
     db.session.delete(venue)
+    db.session.flush()
+    refresh_show_counters(artist_ids=artist_ids)
     db.session.commit()
+    invalidate_venue(venue_id, artist_ids)
+    autocomplete.remove('venue', venue_id)
   except:
     db.session.rollback()
     error = True
-  finally:
-    db.session.close()
 
   if error:
-      flash(f'Error while trying to delete venue { venue.name }. Please Try again.')
+      flash(f'Error while trying to delete venue { venue_name }. Please Try again.')
   else:
-      flash(f'The Venue { venue.name } was successfully deleted.')
+      flash(f'The Venue { venue_name } was successfully deleted.')
 
 
   # BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
@@ -251,46 +336,59 @@ def delete_venue(venue_id):
 #  Artists - LIST
 #------------------------------------------------------------------
 @app.route('/artists')
+@page_cache.cached
 def artists():
   
-  artists = Artist.query.all()
-  data = []
+  genres, match, criteria = genre_filter(Artist)
+  snapshot = None if genres else listing_snapshots.get('artists')
+
+  if snapshot:
+    data, facets = snapshot.payload
+  else:
+    artists = Artist.query.options(*Artist.profile('listing')).filter(*criteria).all()
+    data = []
 
-  for artist in artists:
-    record={
-      'id': artist.id,
-      'name': artist.name
-    } 
-    data.append(record)
+    for artist in artists:
+      record={
+        'id': artist.id,
+        'name': artist.name
+      } 
+      data.append(record)
+    facets = genre_facets(Artist, criteria)
 
-  return render_template('pages/artists.html', artists=data)
+  return render_template('pages/artists.html', artists=data,
+    facets=facets, selected_genres=genres, match=match, facet_args={})
 
 
 #------------------------------------------------------------------
 #  Artists - SEARCH
 #------------------------------------------------------------------
-@app.route('/artists/search', methods=['POST'])
+@app.route('/artists/search', methods=['GET', 'POST'])
 def search_artists():
 
-  search_term = request.form.get('search_term','')
-  search_results = db.session.query(Artist).filter(Artist.name.ilike(f"%{search_term}%")).all()
+  search_term = request.values.get('search_term','')
+  genres, match, criteria = genre_filter(Artist)
+  count, search_results = search_entities(Artist, search_term, app.config['SEARCH_MAX_RESULTS'], criteria)
 
   data = []
 
-  for search in search_results:
+  for search_id, search_name, num_upcoming_shows in search_results:
         record ={
-          "id": search.id,
-          "name": search.name,
-          "num_upcomig_shows": len(db.session.query(Show).filter(Show.artist_id == Artist.id).filter(Show.starttime > datetime.now()).all())
+          "id": search_id,
+          "name": search_name,
+          "num_upcoming_shows": num_upcoming_shows
         }
         data.append(record)
   
   response={
-    "count": len(search_results),
+    "count": count,
     "data": data
   }
 
-  return render_template('pages/search_artists.html', results=response, search_term=request.form.get('search_term', ''))
+  facets = genre_facets(Artist, search_criteria(Artist, search_term)[0] + criteria)
+
+  return render_template('pages/search_artists.html', results=response, search_term=search_term,
+    facets=facets, selected_genres=genres, match=match, facet_args={'search_term': search_term})
 
 #------------------------------------------------------------------
 #  Artists - GET(artist_id)
@@ -298,51 +396,10 @@ def search_artists():
 @app.route('/artists/<int:artist_id>')
 def show_artist(artist_id):
 
-  artist = Artist.query.get(artist_id)
-  if not artist:
+  data = get_or_set(cache, artist_cache_key(artist_id), lambda: artist_detail(artist_id), read_from_primary)
+  if not data:
     return render_template('errors/404.html'), 404
 
-  past_shows= []
-  upcoming_shows = []
-
-  past_shows_results = db.session.query(Show).join(Venue).filter(Show.artist_id == artist_id).filter(Show.starttime < datetime.now()).all()
-  for show in past_shows_results:
-        record = {
-            "venue_id": show.venue.id,
-            "venue_name": show.venue.name,
-            "venue_image_link": show.venue.image_link,
-            "start_time": show.starttime.strftime('%Y-%m-%d %H:%M:%S')
-        }
-        past_shows.append(record)
-
-  upcoming_shows_results = db.session.query(Show).join(Venue).filter(Show.artist_id == artist_id).filter(Show.starttime > datetime.now()).all()
-  for show in upcoming_shows_results:
-        record = {
-          "venue_id": show.venue.id,
-          "venue_name": show.venue.name,
-          "venue_image_link": show.venue.image_link,
-          "start_time":  show.starttime.strftime('%Y-%m-%d %H:%M:%S')
-        }
-        upcoming_shows.append(record)
-
-  data = {
-    "id": artist.id,
-    "name": artist.name,
-    "genres": artist.genres,
-    "city": artist.city,
-    "state": artist.state,
-    "phone": artist.phone,
-    "website": artist.website,
-    "facebook_link": artist.facebook_link,
-    "seeking_venue": artist.seeking_venue,
-    "seeking_description": artist.seeking_description,
-    "image_link": artist.image_link,
-    "past_shows": past_shows,
-    "upcoming_shows": upcoming_shows,
-    "past_shows_count": len(past_shows),
-    "upcoming_shows_count": len(upcoming_shows),
-  }
-
   return render_template('pages/show_artist.html', artist=data)
 
 #------------------------------------------------------------------
@@ -352,7 +409,7 @@ def show_artist(artist_id):
 def edit_artist(artist_id):
 
   form = ArtistForm()
-  artist = Artist.query.get(artist_id)
+  artist = Artist.query.options(*Artist.profile('detail')).get(artist_id)
 
   if artist:
         form.name.data = artist.name
@@ -375,7 +432,7 @@ def edit_artist_submission(artist_id):
   # artist record with ID <artist_id> using the new attributes
 
   error = False
-  artist = Artist.query.get(artist_id)
+  artist = Artist.query.options(*Artist.profile('detail')).get(artist_id)
 
   try:
     artist.name = request.form['name']
@@ -390,12 +447,12 @@ def edit_artist_submission(artist_id):
     artist.image_link = request.form['image_link']
 
     db.session.commit()
+    invalidate_artist(artist_id, show_partner_ids(Show.artist_id, Show.venue_id, artist_id))
+    autocomplete.add('artist', artist_id, request.form['name'])
   except:
     error = True
     db.session.rollback()
     print(sys.exc_info())
-  finally:
-    db.session.close()
 
   if error:
     flash(f'An error occured, Artist { artist_id } was not edited!')
@@ -411,7 +468,7 @@ def edit_artist_submission(artist_id):
 def edit_venue(venue_id):
   
   form = VenueForm()
-  venue = Venue.query.get(venue_id)
+  venue = Venue.query.options(*Venue.profile('detail')).get(venue_id)
 
   if venue:
         form.name.data = venue.name
@@ -436,7 +493,9 @@ def edit_venue_submission(venue_id):
   # venue record with ID <venue_id> using the new attributes
 
   error = False
-  venue = Venue.query.get(venue_id)
+  venue = Venue.query.options(*Venue.profile('detail')).get(venue_id)
+  if not venue:
+    abort(404)
 
   try:
       venue.name = request.form['name']
@@ -451,12 +510,12 @@ def edit_venue_submission(venue_id):
       venue.seeking_description = request.form['seeking_description'] 
       venue.image_link = request.form['image_link']   
       db.session.commit()
+      invalidate_venue(venue_id, show_partner_ids(Show.venue_id, Show.artist_id, venue_id))
+      autocomplete.add('venue', venue_id, request.form['name'])
   except:
       error = True
       db.session.rollback()
       print(sys.exc_info())
-  finally:
-      db.session.close()
 
   if error:
         flash(f'An error occurred. Venue could not be changed.')
@@ -498,13 +557,15 @@ def create_artist_submission():
       seeking_description = request.form['seeking_description']
     )
     db.session.add(artist)
+    db.session.flush()
+    artist_id = artist.id
     db.session.commit()
+    listing_snapshots.touch('artists', artist_id)
+    autocomplete.add('artist', artist_id, request.form['name'])
   except :
     error = True
     db.session.rollback()
     print(sys.exc_info())
-  finally:
-    db.session.close()
 
   if error:
       flash(f'An error occurred. Artist ' + request.form['name'] + ' could not be listed.')
@@ -522,21 +583,27 @@ def delete_artist(artist_id):
   # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
 
   error = False
-  artist = Artist.query.get(artist_id)
+  artist = Artist.query.options(*Artist.profile('delete')).get(artist_id)
+  if not artist:
+    abort(404)
+  artist_name = artist.name
 
   try:
+    venue_ids = show_partner_ids(Show.artist_id, Show.venue_id, artist_id)
     db.session.delete(artist)
+    db.session.flush()
+    refresh_show_counters(venue_ids=venue_ids)
     db.session.commit()
+    invalidate_artist(artist_id, venue_ids)
+    autocomplete.remove('artist', artist_id)
   except:
     db.session.rollback()
     error = True
-  finally:
-    db.session.close()
 
   if error:
-      flash(f'Error while trying to delete Artist { artist.name }. Please Try again.')
+      flash(f'Error while trying to delete Artist { artist_name }. Please Try again.')
   else:
-      flash(f'The Artist { artist.name } was successfully deleted.')
+      flash(f'The Artist { artist_name } was successfully deleted.')
 
 
   # BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
@@ -546,27 +613,54 @@ def delete_artist(artist_id):
 #------------------------------------------------------------------
 #  Shows - LIST
 #------------------------------------------------------------------
+SHOW_FILTER_ARGS = ('from', 'to', 'city', 'state', 'genre')
+
+def show_filters():
+  # ?from= and ?to= are inclusive YYYY-MM-DD days; raises ValueError when malformed.
+  filters = {name: request.args.get(name) or None for name in ('city', 'state', 'genre')}
+  if request.args.get('from'):
+    filters['start'] = datetime.strptime(request.args['from'], '%Y-%m-%d')
+  if request.args.get('to'):
+    filters['end'] = datetime.strptime(request.args['to'], '%Y-%m-%d') + timedelta(days=1)
+  return filters
+
 @app.route('/shows')
+@page_cache.cached
 def shows():
 
-  shows = Show.query.order_by(Show.starttime.desc()).all()
-  data = []
+  cursor = request.args.get('cursor')
+  filter_args = {name: request.args[name] for name in SHOW_FILTER_ARGS if request.args.get(name)}
 
-  for show in shows:
-      artist = db.session.query(Artist).filter_by(id = show.artist_id).first_or_404()
-      venue = db.session.query(Venue).filter_by(id =show.venue_id).first_or_404()
+  try:
+    data, next_cursor = show_timeline(cursor, limit=app.config['SHOWS_PER_PAGE'], **show_filters())
+  except ValueError:
+    abort(400)
 
-      record={
-        'venue_id': venue.id,
-        'venue_name': venue.name,
-        'artist_id': artist.id,
-        'artist_name': artist.name,
-        'artist_image_link': artist.image_link,
-        'start_time': show.starttime.strftime("%m/%d/%Y, %H:%M")
-      } 
-      data.append(record)
+  return render_template('pages/shows.html', shows=data, cursor=cursor, next_cursor=next_cursor,
+    filter_args=filter_args)
 
-  return render_template('pages/shows.html', shows=data)
+@app.route('/shows/calendar')
+@page_cache.cached
+def shows_calendar():
+
+  filter_args = {name: request.args[name] for name in SHOW_FILTER_ARGS[2:] if request.args.get(name)}
+
+  try:
+    month = datetime.strptime(request.args['month'], '%Y-%m') if request.args.get('month') \
+      else datetime.now().replace(day=1)
+    filters = show_filters()
+  except ValueError:
+    abort(400)
+  filters.pop('start', None)
+  filters.pop('end', None)
+
+  previous_month = (month - timedelta(days=1)).strftime('%Y-%m')
+  next_month = (month + timedelta(days=31)).strftime('%Y-%m')
+
+  return render_template('pages/shows_calendar.html',
+    weeks=show_calendar(month.year, month.month, **filters),
+    month=month, previous_month=previous_month, next_month=next_month,
+    filter_args=filter_args)
 
 #------------------------------------------------------------------
 #  Shows - CREATE
@@ -582,29 +676,95 @@ def create_show_submission():
   # called to create new shows in the db, upon submitting new show listing form
   # TODO: insert form data as a new Show record in the db, instead
 
-  error = False
+  error = None
   try:
-    show = Show(
-      artist_id = request.form['artist_id'],
-      venue_id = request.form['venue_id'],
-      starttime = request.form['start_time']
-    )
-    db.session.add(show)
+    show = book_show(request.form['artist_id'], request.form['venue_id'], request.form['start_time'],
+      window_minutes=app.config['SHOW_BOOKING_WINDOW_MINUTES'])
+    venue_id, artist_id = show.venue_id, show.artist_id
     db.session.commit()
-  except:
-    error = True
+    show_booked(venue_id, artist_id)
+  except BookingError as booking_error:
+    error = str(booking_error)
     db.session.rollback()
-    print(sys._exc_info())
-  finally:
-      db.session.close()
+  except SQLAlchemyError:
+    error = 'An error occurred'
+    db.session.rollback()
+    app.logger.exception('Booking a show failed')
 
   if error:
-      flash(f'An error occurred. Show could not be listed.')
+      flash(f'{ error }. Show could not be listed.')
   else:
       flash(f'Show was successfully listed!')
   
   return render_template('pages/home.html')
 
+#------------------------------------------------------------------
+#  Bulk - IMPORT
+#------------------------------------------------------------------
+@app.route('/import/<kind>', methods=['POST'])
+def import_upload(kind):
+  upload = request.files.get('file')
+  if kind not in IMPORTS or not upload:
+    abort(400)
+
+  format = request.args.get('format') or guess_format(upload.filename or '')
+  stream = io.TextIOWrapper(upload.stream, encoding='utf-8', newline='')
+  try:
+    report = import_records(kind, stream, format,
+      chunk_size=app.config['IMPORT_CHUNK_SIZE'], max_errors=app.config['IMPORT_MAX_ERRORS'],
+      window_minutes=app.config['SHOW_BOOKING_WINDOW_MINUTES'])
+  except ValueError:
+    abort(400)
+  finally:
+    cache.clear()
+    listing_snapshots.rebuild()
+
+  return jsonify(report.to_dict())
+
+#------------------------------------------------------------------
+#  Bulk - EXPORT
+#------------------------------------------------------------------
+@app.route('/export/<any(venues, artists, shows):kind>.<any(csv, jsonl, parquet):format>')
+def export_download(kind, format):
+  if not format_available(format):
+    abort(501)
+
+  chunks = export_table(kind, format, chunk_size=app.config['EXPORT_CHUNK_SIZE'])
+  response = Response(stream_with_context(chunks), mimetype=FORMATS[format])
+  response.headers['Content-Disposition'] = 'attachment; filename={}.{}'.format(kind, format)
+  return response
+
+#------------------------------------------------------------------
+#  Autocomplete
+#------------------------------------------------------------------
+@app.route('/api/autocomplete')
+def autocomplete_names():
+  kind = request.args.get('kind')
+  if kind not in ('venue', 'artist'):
+    abort(400)
+  return jsonify(autocomplete.search(kind, request.args.get('q', ''), app.config['AUTOCOMPLETE_LIMIT']))
+
+#------------------------------------------------------------------
+#  Cache - STATS
+#------------------------------------------------------------------
+@app.route('/cache/stats')
+def cache_stats():
+  return jsonify(cache.stats())
+
+#------------------------------------------------------------------
+#  Listing snapshots - METRICS
+#------------------------------------------------------------------
+@app.route('/metrics/snapshots')
+def snapshot_metrics():
+  return jsonify(listing_snapshots.status())
+
+#------------------------------------------------------------------
+#  Connection pool - METRICS
+#------------------------------------------------------------------
+@app.route('/metrics/pool')
+def pool_metrics():
+  return jsonify(dict(pool_status(db.engine), replicas=db.replicas.status()))
+
 @app.errorhandler(404)
 def not_found_error(error):
     return render_template('errors/404.html'), 404
@@ -624,6 +784,109 @@ if not app.debug:
     app.logger.addHandler(file_handler)
     app.logger.info('errors')
 
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+from explain import check_route_plans
+from importer import IMPORTS, guess_format, import_records
+from exporter import EXPORTS, FORMATS, export_table, format_available
+
+@app.cli.command('check-plans')
+def check_plans():
+  """Fail if a read route's query plan falls back to a sequential scan."""
+  routes = plan_check_routes()
+
+  cache.clear()
+  failures = check_route_plans(app, db.engine, routes)
+
+  for path, table, statement in failures:
+    print('{}: sequential scan on {}\n  {}'.format(path, table, ' '.join(statement.split())))
+  if failures:
+    sys.exit(1)
+  print('No unexpected sequential scans in {} routes.'.format(len(routes)))
+
+def plan_check_routes():
+  """The (method, path, form data) requests whose plans check-plans explains."""
+  venue_id = db.session.query(db.func.min(Venue.id)).scalar()
+  artist_id = db.session.query(db.func.min(Artist.id)).scalar()
+  return [
+    ('GET', '/venues', None),
+    ('GET', '/artists', None),
+    ('GET', '/shows', None),
+    ('GET', '/shows?from=2026-01-01&to=2026-01-31', None),
+    ('GET', '/shows?city=austin', None),
+    ('GET', '/shows/calendar?month=2026-01', None),
+    ('GET', '/venues/{}'.format(venue_id), None),
+    ('GET', '/artists/{}'.format(artist_id), None),
+    ('POST', '/venues/search', {'search_term': 'the'}),
+    ('POST', '/artists/search', {'search_term': 'the'}),
+  ]
+
+@app.cli.command('import')
+@click.argument('kind', type=click.Choice(sorted(IMPORTS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', type=click.Choice(['csv', 'jsonl']), help='Defaults to the file extension.')
+@click.option('--chunk-size', type=int, default=None)
+def import_command(kind, path, format, chunk_size):
+  """Bulk load venues, artists or shows from a CSV or JSONL file."""
+  with open(path, encoding='utf-8', newline='') as stream:
+    report = import_records(kind, stream, format or guess_format(path),
+      chunk_size=chunk_size or app.config['IMPORT_CHUNK_SIZE'], max_errors=app.config['IMPORT_MAX_ERRORS'],
+      window_minutes=app.config['SHOW_BOOKING_WINDOW_MINUTES'])
+  cache.clear()
+  listing_snapshots.rebuild()
+
+  for error in report.errors:
+    print('line {line}: {error}'.format(**error))
+  print('{} inserted, {} failed'.format(report.inserted, report.failed))
+
+@app.cli.command('export')
+@click.argument('kind', type=click.Choice(sorted(EXPORTS)))
+@click.option('--format', type=click.Choice(sorted(FORMATS)), default='csv')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Defaults to <kind>.<format>.')
+@click.option('--chunk-size', type=int, default=None)
+def export_command(kind, format, output, chunk_size):
+  """Dump venues, artists or shows as CSV, JSONL or Parquet."""
+  if not format_available(format):
+    raise click.UsageError('Parquet export needs the pyarrow package.')
+
+  output = output or '{}.{}'.format(kind, format)
+  with open(output, 'wb') as stream:
+    for chunk in export_table(kind, format, chunk_size=chunk_size or app.config['EXPORT_CHUNK_SIZE']):
+      stream.write(chunk)
+  print('Exported {} to {}'.format(kind, output))
+
+@app.cli.command('build-assets')
+def build_assets_command():
+  """Bundle, minify, fingerprint and pre-compress the static assets."""
+  for name, path in sorted(build_assets(app.static_folder).items()):
+    print('{} -> {}'.format(name, path))
+
+@app.cli.command('roll-counters')
+def roll_counters():
+  """Refresh the upcoming show counters of entities whose next show started."""
+  print('Refreshed {} venues/artists.'.format(roll_forward()))
+
+@app.cli.command('check-counters')
+@click.option('--fix', is_flag=True, help='Recompute every counter after reporting.')
+def check_counters(fix):
+  """Recount upcoming shows from scratch and report counter drift."""
+  drift = counter_drift()
+
+  for table, entity_id, stored, actual, stored_next, actual_next in drift:
+    print('{} {}: count {} != {}, next show {} != {}'.format(table, entity_id, stored, actual, stored_next, actual_next))
+  print('{} rows drifted.'.format(len(drift)))
+
+  if fix and drift:
+    refresh_show_counters(
+      venue_ids=[row[1] for row in drift if row[0] == 'venue'],
+      artist_ids=[row[1] for row in drift if row[0] == 'artist'])
+    db.session.commit()
+    print('Fixed.')
+  if drift and not fix:
+    sys.exit(1)
+
 #----------------------------------------------------------------------------#
 # Launch.
 #----------------------------------------------------------------------------#
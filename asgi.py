@@ -0,0 +1,184 @@
+"""ASGI serving mode.
+
+    uvicorn asgi:application --workers 4
+
+The routes in ASYNC_ENDPOINTS run on the event loop. Their Flask view is
+dispatched inside AsyncSession.run_sync(), with the async session's sync
+facade standing in for db.session, so every statement goes through asyncpg
+and the request waits on PostgreSQL without holding a thread. That session
+routes reads to the replicas exactly like db.session does, and every
+asyncpg engine gets the same statement timeout. Every other route is
+handed to the WSGI app on a thread pool by asgiref.
+
+Only the statements are asynchronous: the rest of the view runs on the
+loop itself and stalls every other connection while it works. A route
+belongs in ASYNC_ENDPOINTS only if it does nothing but query and serialize
+-- no template rendering, no cache or Redis calls, no waiting on locks or
+other threads. That leaves out the HTML pages (Jinja, the page cache and
+the Redis-backed cache) and /api/autocomplete (it may wait for its index).
+
+Needs the SQLAlchemy, asyncpg, asgiref and uvicorn versions pinned in
+requirements.txt.
+"""
+import io
+
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from werkzeug.exceptions import HTTPException
+
+from app import app, db
+from pool import set_transaction_statement_timeout
+from replicas import ReplicaRouting
+
+# Views that only query and serialize; see the module docstring.
+ASYNC_ENDPOINTS = {
+    'api.list_resource',
+}
+
+#----------------------------------------------------------------------------#
+# Engine.
+#----------------------------------------------------------------------------#
+
+def async_database_url(url):
+    return 'postgresql+asyncpg://' + url.partition('://')[2]
+
+def make_async_engine(config, url=None):
+    """The app's database (or the replica at `url`) through asyncpg.
+
+    Uses the same pool settings and statement timeout as the WSGI engines.
+    """
+    url = async_database_url(url or config['SQLALCHEMY_DATABASE_URI'])
+    timeout = config['DB_STATEMENT_TIMEOUT']
+
+    if config['DB_PGBOUNCER']:
+        # Transaction pooling cannot keep asyncpg's prepared statements.
+        engine = create_async_engine(url, poolclass=NullPool, connect_args={'statement_cache_size': 0})
+        if timeout:
+            set_transaction_statement_timeout(engine.sync_engine, timeout)
+        return engine
+
+    options = dict(config['SQLALCHEMY_ENGINE_OPTIONS'])
+    options.pop('connect_args', None)
+    if timeout:
+        options['connect_args'] = {'server_settings': {'statement_timeout': str(timeout)}}
+    return create_async_engine(url, **options)
+
+#----------------------------------------------------------------------------#
+# Session.
+#----------------------------------------------------------------------------#
+
+class AsyncRoutingSession(ReplicaRouting, Session):
+    """db.session of the async routes: ReplicaRouting over asyncpg engines.
+
+    `replicas` is the app's ReplicaPool, which still does the choosing and
+    the health checks; `replica_binds` maps each of its engines to the
+    asyncpg engine of the same replica.
+    """
+
+    def __init__(self, app, replicas, replica_binds, **options):
+        self.app = app
+        self.replicas = replicas
+        self.replica_binds = replica_binds
+        super(AsyncRoutingSession, self).__init__(**options)
+
+    def replica_bind(self, engine):
+        return self.replica_binds[engine]
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        replica = self.routed_bind(clause)
+        if replica is not None:
+            return replica
+        return super(AsyncRoutingSession, self).get_bind(mapper, clause, **kwargs)
+
+#----------------------------------------------------------------------------#
+# Dispatch.
+#----------------------------------------------------------------------------#
+
+def _dispatch(session, environ):
+    """Run the Flask request for `environ` with `session` as db.session.
+
+    Called through run_sync(), so this runs in its own greenlet. Flask's
+    context stacks and Flask-SQLAlchemy's scoped session are both keyed by
+    the current greenlet, which keeps concurrent requests apart.
+    """
+    ctx = app.request_context(environ)
+    error = None
+    try:
+        ctx.push()
+        db.session.registry.set(session)
+        try:
+            response = app.full_dispatch_request()
+        except Exception as e:
+            error = e
+            response = app.handle_exception(e)
+        return response.status_code, response.headers.to_wsgi_list(), response.get_data()
+    finally:
+        ctx.auto_pop(error)
+
+async def _read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+class AsyncReadRoutes(object):
+    """ASGI app serving `endpoints` asynchronously and the rest over WSGI."""
+
+    def __init__(self, app, engine, replica_engines=(), endpoints=ASYNC_ENDPOINTS):
+        self.app = app
+        self.engine = engine
+        self.replica_engines = list(replica_engines)
+        # Paired by position with db.replicas.engines, both built from SQLALCHEMY_REPLICA_URIS.
+        self.replica_binds = {
+            replica: async_replica.sync_engine
+            for replica, async_replica in zip(db.replicas.engines, self.replica_engines)
+        }
+        self.endpoints = endpoints
+        self.wsgi = WsgiToAsgi(app)
+        self.urls = app.url_map.bind('localhost')
+
+    def _endpoint(self, scope):
+        try:
+            endpoint, _ = self.urls.match(scope['path'], method=scope['method'])
+        except HTTPException:
+            return None
+        return endpoint
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http' or self._endpoint(scope) not in self.endpoints:
+            return await self.wsgi(scope, receive, send)
+
+        body = await _read_body(receive)
+        environ = WsgiToAsgiInstance(self.app).build_environ(scope, io.BytesIO(body))
+
+        async with AsyncSession(self.engine, sync_session_class=AsyncRoutingSession,
+                app=self.app, replicas=db.replicas, replica_binds=self.replica_binds) as session:
+            status, headers, data = await session.run_sync(_dispatch, environ)
+
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers],
+        })
+        await send({'type': 'http.response.body', 'body': data})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for engine in [self.engine] + self.replica_engines:
+                    await engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+application = AsyncReadRoutes(app, make_async_engine(app.config), [
+    make_async_engine(app.config, url) for url in app.config['SQLALCHEMY_REPLICA_URIS']
+])
@@ -0,0 +1,181 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import tempfile
+
+import brotli
+from flask import request, send_from_directory, url_for
+from rcssmin import cssmin
+from rjsmin import jsmin
+
+# bundle name -> source files under static/, concatenated in order
+BUNDLES = {
+    'main.css': [
+        'css/bootstrap.min.css',
+        'css/layout.main.css',
+        'css/main.css',
+        'css/main.responsive.css',
+        'css/main.quickfix.css',
+    ],
+    'head.js': [
+        'js/libs/modernizr-2.8.2.min.js',
+        'js/libs/moment.min.js',
+        'js/script.js',
+    ],
+    'main.js': [
+        'js/libs/bootstrap-3.1.1.min.js',
+        'js/plugins.js',
+    ],
+    'jquery.js': ['js/libs/jquery-1.11.1.min.js'],
+    'respond.js': ['js/libs/respond-1.4.2.min.js'],
+    'autocomplete.js': ['js/autocomplete.js'],
+}
+
+# Bundles are written next to css/ and js/, so relative url()s still resolve.
+DIST = 'dist'
+MANIFEST = 'manifest.json'
+
+# Fingerprinted files never change, so browsers may keep them for a year.
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# Pre-compressed variants, preferred in this order
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+MINIFIERS = {
+    '.css': cssmin,
+    '.js': jsmin,
+}
+
+#----------------------------------------------------------------------------#
+# Build.
+#----------------------------------------------------------------------------#
+
+def _write(path, data):
+    """Write through a temporary file, so no reader sees a partial file."""
+    fd, temp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.build-')
+    try:
+        with os.fdopen(fd, 'wb') as stream:
+            stream.write(data)
+        # mkstemp creates the file private; bundles are served by anyone.
+        os.chmod(temp, 0o644)
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+def _compress(path, data):
+    _write(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+    _write(path + '.br', brotli.compress(data, quality=11))
+
+def build(static_folder, bundles=BUNDLES):
+    """Bundle, minify, fingerprint and pre-compress every bundle.
+
+    Writes <name>.<hash><ext> plus its .gz and .br to static/dist, and a
+    manifest mapping bundle names to those paths. Every file is swapped in
+    whole, the compressed variants before the file itself, so workers
+    building at the same time never serve a partial bundle. Returns the
+    manifest.
+    """
+    dist = os.path.join(static_folder, DIST)
+    os.makedirs(dist, exist_ok=True)
+
+    manifest = {}
+    for name, sources in bundles.items():
+        stem, ext = os.path.splitext(name)
+        parts = []
+        for source in sources:
+            with open(os.path.join(static_folder, source), encoding='utf-8') as stream:
+                parts.append(MINIFIERS[ext](stream.read()))
+        # The semicolon keeps a script without a trailing one from running into the next.
+        data = (';\n' if ext == '.js' else '\n').join(parts).encode('utf-8')
+
+        filename = '{}.{}{}'.format(stem, hashlib.sha256(data).hexdigest()[:12], ext)
+        path = os.path.join(dist, filename)
+        if not os.path.exists(path):
+            _compress(path, data)
+            _write(path, data)
+        manifest[name] = '{}/{}'.format(DIST, filename)
+
+    _write(os.path.join(dist, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+def _stale(static_folder, bundles):
+    """Whether the manifest misses a bundle, a built file or a source change."""
+    path = os.path.join(static_folder, DIST, MANIFEST)
+    if not os.path.exists(path):
+        return True
+    with open(path) as stream:
+        manifest = json.load(stream)
+    if set(bundles) - set(manifest):
+        return True
+    if not all(os.path.exists(os.path.join(static_folder, built)) for built in manifest.values()):
+        return True
+    built = os.path.getmtime(path)
+    return any(
+        os.path.getmtime(os.path.join(static_folder, source)) > built
+        for sources in bundles.values() for source in sources
+    )
+
+#----------------------------------------------------------------------------#
+# Flask integration.
+#----------------------------------------------------------------------------#
+
+class Assets(object):
+    """Serves the built bundles and exposes asset_url() to templates.
+
+    asset_url('main.css') is url_for('static') on the fingerprinted file
+    from the manifest. The static view answers those files with the
+    smallest pre-compressed variant the client accepts and an immutable
+    Cache-Control; other static files are served as before. The bundles
+    are built at startup unless the manifest lists every bundle, its files
+    exist and no source changed since it was written, so a deploy never
+    serves the previous release's bundles.
+    """
+
+    def __init__(self, app=None, bundles=BUNDLES):
+        self.bundles = bundles
+        self.manifest = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        path = os.path.join(self.static_folder, DIST, MANIFEST)
+        if _stale(self.static_folder, self.bundles):
+            self.manifest = build(self.static_folder, self.bundles)
+        else:
+            with open(path) as stream:
+                self.manifest = json.load(stream)
+        self.fingerprinted = set(self.manifest.values())
+
+        static = app.view_functions['static']
+
+        def serve_static(filename):
+            if filename in self.fingerprinted:
+                return self.send(filename)
+            return static(filename)
+
+        app.view_functions['static'] = serve_static
+        app.add_template_global(self.url, 'asset_url')
+
+    def url(self, name):
+        return url_for('static', filename=self.manifest[name])
+
+    def send(self, filename):
+        served = filename
+        encoding = None
+        for candidate, suffix in ENCODINGS:
+            if candidate in request.accept_encodings and \
+                    os.path.exists(os.path.join(self.static_folder, filename + suffix)):
+                served = filename + suffix
+                encoding = candidate
+                break
+
+        response = send_from_directory(self.static_folder, served, mimetype=mimetypes.guess_type(filename)[0])
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = IMMUTABLE
+        return response
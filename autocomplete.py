@@ -0,0 +1,162 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+#----------------------------------------------------------------------------#
+# Prefix index.
+#----------------------------------------------------------------------------#
+
+class PrefixIndex(object):
+    """Sorted in-memory index of names for prefix lookups.
+
+    Every word suffix of a name is indexed ("the blue room" is found by
+    "the b", "blue" and "room"), lower-cased. Lookups are a bisect into a
+    sorted list, so they never touch the database.
+    """
+
+    def __init__(self):
+        self._entries = []
+        self._names = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(name):
+        words = (name or '').lower().split()
+        return {' '.join(words[index:]) for index in range(len(words))}
+
+    def build(self, rows):
+        entries = []
+        names = {}
+        for entity_id, name in rows:
+            names[entity_id] = name
+            entries.extend((key, entity_id) for key in self._keys(name))
+        entries.sort()
+        with self._lock:
+            self._entries = entries
+            self._names = names
+
+    def add(self, entity_id, name):
+        with self._lock:
+            self._discard(entity_id)
+            self._names[entity_id] = name
+            for key in self._keys(name):
+                insort(self._entries, (key, entity_id))
+
+    def remove(self, entity_id):
+        with self._lock:
+            self._discard(entity_id)
+
+    def _discard(self, entity_id):
+        name = self._names.pop(entity_id, None)
+        if name is None:
+            return
+        for key in self._keys(name):
+            index = bisect_left(self._entries, (key, entity_id))
+            if index < len(self._entries) and self._entries[index] == (key, entity_id):
+                del self._entries[index]
+
+    def search(self, prefix, limit=10):
+        prefix = ' '.join(prefix.lower().split())
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        with self._lock:
+            index = bisect_left(self._entries, (prefix,))
+            while index < len(self._entries) and len(results) < limit:
+                key, entity_id = self._entries[index]
+                if not key.startswith(prefix):
+                    break
+                if entity_id not in seen:
+                    seen.add(entity_id)
+                    results.append({'id': entity_id, 'name': self._names[entity_id]})
+                index += 1
+        return results
+
+#----------------------------------------------------------------------------#
+# Autocomplete.
+#----------------------------------------------------------------------------#
+
+class Autocomplete(object):
+    """One PrefixIndex per kind, built and rebuilt by a background thread.
+
+    The thread starts with the first request a worker handles (so it runs
+    in each worker after forking), builds every index, and rebuilds them
+    every `max_age` seconds, which picks up writes made by other worker
+    processes. A rebuild loads into a new index and swaps it in; writes
+    made in this process while it loads are replayed onto it first.
+    Lookups only ever wait for the very first build, and at most `wait`
+    seconds.
+    """
+
+    def __init__(self, app, loaders, max_age=300, wait=5, retry_delay=5):
+        self.app = app
+        self.loaders = loaders
+        self.max_age = max_age
+        self.wait = wait
+        self.retry_delay = retry_delay
+        self._indexes = {}
+        self._pending = {}
+        self._ready = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        app.before_request(self.start)
+
+    def start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    thread = threading.Thread(target=self._run, name='autocomplete', daemon=True)
+                    thread.start()
+                    self._thread = thread
+
+    def search(self, kind, prefix, limit=10):
+        self.start()
+        self._ready.wait(self.wait)
+        index = self._indexes.get(kind)
+        return index.search(prefix, limit) if index is not None else []
+
+    def add(self, kind, entity_id, name):
+        self._change(kind, 'add', int(entity_id), name)
+
+    def remove(self, kind, entity_id):
+        self._change(kind, 'remove', int(entity_id))
+
+    def rebuild(self, kind):
+        with self._lock:
+            self._pending[kind] = []
+        index = PrefixIndex()
+        index.build(self.loaders[kind]())
+        with self._lock:
+            for change in self._pending.pop(kind):
+                self._apply(index, change)
+            self._indexes[kind] = index
+
+    def _change(self, kind, *change):
+        with self._lock:
+            if kind in self._pending:
+                self._pending[kind].append(change)
+            index = self._indexes.get(kind)
+        if index is not None:
+            self._apply(index, change)
+
+    @staticmethod
+    def _apply(index, change):
+        if change[0] == 'add':
+            index.add(*change[1:])
+        else:
+            index.remove(*change[1:])
+
+    def _run(self):
+        while True:
+            delay = self.max_age
+            with self.app.app_context():
+                try:
+                    for kind in self.loaders:
+                        self.rebuild(kind)
+                    self._ready.set()
+                except Exception:
+                    self.app.logger.exception('Autocomplete index rebuild failed')
+                    delay = self.retry_delay
+            time.sleep(delay)
@@ -0,0 +1,6 @@
+"""Benchmarks for the Fyyur app.
+
+Route benchmarks run with `python -m benchmarks` (see __main__.py); the
+micro-benchmarks can be run on their own, e.g.
+`python -m benchmarks.datetime_filter`.
+"""
@@ -0,0 +1,86 @@
+"""Benchmark command line.
+
+    python -m benchmarks seed --venues 1000 --artists 2000 --shows 20000
+    python -m benchmarks run --concurrency 8 --requests 200 [--writes] [--save-baseline | --compare]
+
+Runs against the database configured for the app (DATABASE_URL). The schema
+relies on PostgreSQL arrays and full-text search, so the stand-in must be a
+local PostgreSQL rather than SQLite.
+"""
+import argparse
+import json
+import os
+import sys
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Fyyur benchmarks.')
+    commands = parser.add_subparsers(dest='command')
+
+    seed = commands.add_parser('seed', help='Insert a seeded synthetic data set.')
+    seed.add_argument('--venues', type=int, default=1000)
+    seed.add_argument('--artists', type=int, default=2000)
+    seed.add_argument('--shows', type=int, default=20000)
+    seed.add_argument('--seed', type=int, default=1)
+
+    run = commands.add_parser('run', help='Benchmark every route.')
+    run.add_argument('--requests', type=int, default=100, help='Requests per read route.')
+    run.add_argument('--concurrency', type=int, default=4)
+    run.add_argument('--writes', action='store_true', help='Also run create/edit/delete cycles.')
+    run.add_argument('--seed', type=int, default=1)
+    run.add_argument('--baseline', default=BASELINE)
+    run.add_argument('--tolerance', type=float, default=0.2, help='Allowed p95 slowdown.')
+    run.add_argument('--save-baseline', action='store_true')
+    run.add_argument('--compare', action='store_true', help='Exit 1 on regressions.')
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 2
+
+    from app import app, db
+
+    if args.command == 'seed':
+        from benchmarks.generator import seed as seed_data
+        with app.app_context():
+            seed_data(db, args.venues, args.artists, args.shows, seed=args.seed)
+        print('Seeded {} venues, {} artists, {} shows.'.format(args.venues, args.artists, args.shows))
+        return 0
+
+    from benchmarks.runner import compare, run as run_benchmark
+
+    results = run_benchmark(app, db, args.requests, args.concurrency, args.writes, args.seed)
+
+    print('{:<26} {:>8} {:>9} {:>9} {:>9} {:>9} {:>8}'.format(
+        'route', 'requests', 'p50 ms', 'p95 ms', 'p99 ms', 'req/s', 'queries'))
+    for name, stats in results.items():
+        if name.startswith('_'):
+            continue
+        print('{:<26} {requests:>8} {p50_ms:>9.1f} {p95_ms:>9.1f} {p99_ms:>9.1f} {throughput_rps:>9.1f} {queries:>8}'.format(
+            name, queries=str(stats['max_queries']), **stats))
+    print('pool: {}'.format(results['_pool']))
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as stream:
+            json.dump(results, stream, indent=2, sort_keys=True)
+        print('Baseline saved to {}'.format(args.baseline))
+
+    if args.compare:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as stream:
+                baseline = json.load(stream)
+        else:
+            print('No baseline at {}; checking query budgets and leaks only.'.format(args.baseline))
+
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print('REGRESSION ' + regression)
+        if regressions:
+            return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""Stress test: many parallel bookings for the same venue and time slot.
+
+Creates a throwaway venue and one artist per client, then has every client
+POST /api/v1/shows for the same venue at the same start time at once.
+Exactly one booking may succeed; every other one must get a 409.
+
+    python -m benchmarks.booking_stress [--clients 50] [--rounds 5]
+"""
+import argparse
+import sys
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+def run(app, db, clients=50, rounds=5):
+    from models import Venue, Artist, Show
+
+    tag = uuid.uuid4().hex[:12]
+    with app.app_context():
+        venue = Venue(name='Stress venue ' + tag, city='Austin', state='TX', genres=['Jazz'])
+        artists = [Artist(name='Stress artist {} {}'.format(tag, index), genres=['Jazz']) for index in range(clients)]
+        db.session.add(venue)
+        db.session.add_all(artists)
+        db.session.commit()
+        venue_id = venue.id
+        artist_ids = [artist.id for artist in artists]
+
+    failures = 0
+    try:
+        for round_number in range(rounds):
+            start_time = (datetime(2099, 1, 1, 20, 0) + timedelta(days=round_number)).isoformat()
+            statuses = []
+            barrier = threading.Barrier(clients)
+
+            def book(artist_id):
+                client = app.test_client()
+                barrier.wait()
+                response = client.post('/api/v1/shows', json={
+                    'venue_id': venue_id, 'artist_id': artist_id, 'start_time': start_time
+                })
+                statuses.append(response.status_code)
+
+            threads = [threading.Thread(target=book, args=(artist_id,)) for artist_id in artist_ids]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            created = statuses.count(201)
+            conflicts = statuses.count(409)
+            ok = created == 1 and conflicts == clients - 1
+            failures += not ok
+            print('round {}: {} booked, {} conflicts, {} other -> {}'.format(
+                round_number + 1, created, conflicts, clients - created - conflicts, 'ok' if ok else 'FAILED'))
+    finally:
+        with app.app_context():
+            db.session.query(Show).filter(Show.venue_id == venue_id).delete(synchronize_session=False)
+            db.session.query(Artist).filter(Artist.id.in_(artist_ids)).delete(synchronize_session=False)
+            db.session.query(Venue).filter(Venue.id == venue_id).delete(synchronize_session=False)
+            db.session.commit()
+
+    return failures
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    from app import app, db
+    sys.exit(1 if run(app, db, args.clients, args.rounds) else 0)
@@ -0,0 +1,70 @@
+"""Micro-benchmark: render show tiles through the `datetime` Jinja filter.
+
+Compares the previous filter (views strftime() a datetime, the filter parses
+it back with dateutil and rebuilds the babel pattern) with the current one
+(datetime passed straight through, babel pattern compiled once per format
+and locale).
+
+    python -m benchmarks.datetime_filter [--tiles 10000] [--repeat 5]
+"""
+import argparse
+import timeit
+from datetime import datetime, timedelta
+
+import babel.dates
+import dateutil.parser
+from jinja2 import Environment
+
+from app import format_datetime
+
+TILE_TEMPLATE = """
+{%- for show in shows %}
+<div class="tile tile-show"><h4>{{ show.start_time|datetime('full') }}</h4></div>
+{%- endfor %}
+"""
+
+def legacy_format_datetime(value, format='medium'):
+    date = dateutil.parser.parse(value)
+    if format == 'full':
+        format="EEEE MMMM, d, y 'at' h:mma"
+    elif format == 'medium':
+        format="EE MM, dd, y h:mma"
+    return babel.dates.format_datetime(date, format, locale='en')
+
+def make_template(filter_function):
+    env = Environment()
+    env.filters['datetime'] = filter_function
+    return env.from_string(TILE_TEMPLATE)
+
+def run(tiles, repeat):
+    start = datetime(2021, 8, 11, 20, 0)
+    starttimes = [start + timedelta(hours=i) for i in range(tiles)]
+
+    legacy = make_template(legacy_format_datetime)
+    current = make_template(format_datetime)
+
+    cases = {
+        'legacy (strftime + parse)': lambda: legacy.render(shows=[
+            {'start_time': starttime.strftime("%m/%d/%Y, %H:%M")} for starttime in starttimes
+        ]),
+        'current (datetime, compiled pattern)': lambda: current.render(shows=[
+            {'start_time': starttime} for starttime in starttimes
+        ]),
+    }
+
+    results = {}
+    for name, render in cases.items():
+        best = min(timeit.repeat(render, number=1, repeat=repeat))
+        results[name] = best
+        print('{:<40} {:>8.1f} ms'.format(name, best * 1000))
+
+    legacy_time, current_time = results.values()
+    print('speedup: {:.1f}x'.format(legacy_time / current_time))
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tiles', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    run(args.tiles, args.repeat)
@@ -0,0 +1,61 @@
+"""Benchmark: genre facet counts on a large artist table.
+
+Tops the artist table up to --artists rows (500k by default) with seeded
+synthetic data, then times genre_facets() unfiltered and drilled down to
+one and two genres. Fails when a scenario's p95 exceeds --budget-ms or a
+facet computation takes more than one statement.
+
+    python -m benchmarks.facets [--artists 500000] [--repeat 20] [--budget-ms 500]
+"""
+import argparse
+import sys
+import time
+
+from benchmarks.generator import seed
+from benchmarks.runner import percentile
+
+SCENARIOS = (
+    ('all artists', ()),
+    ('one genre', ('Jazz',)),
+    ('two genres', ('Jazz', 'Blues')),
+)
+
+def run(app, db, artists=500000, repeat=20, budget_ms=500):
+    from explain import capture_statements
+    from facets import genre_criteria, genre_facets
+    from models import Artist
+
+    failures = 0
+    with app.app_context():
+        missing = artists - db.session.query(db.func.count(Artist.id)).scalar()
+        if missing > 0:
+            print('Seeding {} artists...'.format(missing))
+            seed(db, venues=0, artists=missing, shows=0)
+
+        for name, genres in SCENARIOS:
+            criteria = genre_criteria(Artist, genres)
+            timings = []
+            for _ in range(repeat):
+                with capture_statements(db.engine) as statements:
+                    started = time.perf_counter()
+                    facets = genre_facets(Artist, criteria)
+                    timings.append((time.perf_counter() - started) * 1000)
+                db.session.rollback()
+
+            p95 = percentile(timings, 0.95)
+            ok = p95 <= budget_ms and len(statements) == 1
+            failures += not ok
+            print('{:<12} {:>3} genres  p50 {:>7.1f} ms  p95 {:>7.1f} ms  {} statement(s) -> {}'.format(
+                name, len(facets), percentile(timings, 0.5), p95, len(statements), 'ok' if ok else 'FAILED'))
+
+    return failures
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--artists', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--budget-ms', type=float, default=500)
+    args = parser.parse_args()
+
+    from app import app, db
+    sys.exit(1 if run(app, db, args.artists, args.repeat, args.budget_ms) else 0)
@@ -0,0 +1,107 @@
+"""Seeded synthetic data for benchmarks.
+
+Generates N venues, M artists and K shows. The same seed always yields the
+same rows, so runs against different builds compare like with like.
+"""
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+GENRES = (
+    'Alternative', 'Blues', 'Classical', 'Country', 'Electronic', 'Folk',
+    'Funk', 'Hip-Hop', 'Heavy Metal', 'Instrumental', 'Jazz', 'Musical Theatre',
+    'Pop', 'Punk', 'R&B', 'Reggae', 'Rock n Roll', 'Soul', 'Other',
+)
+
+AREAS = (
+    ('San Francisco', 'CA'), ('New York', 'NY'), ('Austin', 'TX'),
+    ('Chicago', 'IL'), ('Seattle', 'WA'), ('Nashville', 'TN'),
+    ('New Orleans', 'LA'), ('Denver', 'CO'), ('Portland', 'OR'), ('Miami', 'FL'),
+)
+
+WORDS = (
+    'blue', 'red', 'golden', 'velvet', 'electric', 'midnight', 'silver',
+    'lost', 'wild', 'hollow', 'echo', 'room', 'hall', 'club', 'den', 'lounge',
+    'parlour', 'garden', 'union', 'tavern', 'stars', 'wolves', 'saints',
+)
+
+def _name(rng, index):
+    return '{} {} {}'.format(rng.choice(WORDS).title(), rng.choice(WORDS).title(), index)
+
+def _common(rng, index):
+    city, state = rng.choice(AREAS)
+    return {
+        'name': _name(rng, index),
+        'city': city,
+        'state': state,
+        'phone': '{:03d}-{:03d}-{:04d}'.format(rng.randrange(1000), rng.randrange(1000), rng.randrange(10000)),
+        'image_link': 'https://images.example.com/{}.jpg'.format(index),
+        'facebook_link': 'https://www.facebook.com/{}'.format(index),
+        'website': 'https://www.example.com/{}'.format(index),
+        'seeking_description': 'Looking for great people to play with.',
+        'genres': rng.sample(GENRES, rng.randint(1, 3)),
+        'upcoming_shows_count': 0,
+    }
+
+def _insert(db, table, rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            db.session.execute(table.insert(), chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(table.insert(), chunk)
+    db.session.commit()
+
+def seed(db, venues=1000, artists=2000, shows=20000, seed=1, chunk_size=5000, now=None):
+    """Insert the synthetic catalogue into the app's database.
+
+    Shows are spread over two years around `now`, so roughly half are past
+    and half upcoming. Counters are refreshed and the tables analyzed
+    afterwards so query plans reflect the new sizes.
+    """
+    from models import Venue, Artist, Show
+    from counters import COUNTED, refresh_counters
+
+    rng = random.Random(seed)
+    now = now or datetime.now()
+
+    venue_offset = db.session.query(db.func.coalesce(db.func.max(Venue.id), 0)).scalar()
+    artist_offset = db.session.query(db.func.coalesce(db.func.max(Artist.id), 0)).scalar()
+
+    def venue_rows():
+        for index in range(venues):
+            row = _common(rng, index)
+            row.update(address='{} Main Street'.format(index), seeking_talent=rng.random() < 0.5)
+            yield row
+
+    def artist_rows():
+        for index in range(artists):
+            row = _common(rng, index)
+            row.update(seeking_venue=rng.random() < 0.5)
+            yield row
+
+    _insert(db, Venue.__table__, venue_rows(), chunk_size)
+    _insert(db, Artist.__table__, artist_rows(), chunk_size)
+
+    venue_ids = [venue_id for venue_id, in db.session.query(Venue.id).filter(Venue.id > venue_offset)]
+    artist_ids = [artist_id for artist_id, in db.session.query(Artist.id).filter(Artist.id > artist_offset)]
+
+    def show_rows():
+        for _ in range(shows):
+            yield {
+                'venue_id': rng.choice(venue_ids),
+                'artist_id': rng.choice(artist_ids),
+                'starttime': now + timedelta(minutes=rng.randint(-525600, 525600)),
+            }
+
+    _insert(db, Show.__table__, show_rows(), chunk_size)
+
+    for model, show_fk in COUNTED:
+        refresh_counters(model, show_fk, now=now)
+    db.session.commit()
+
+    with db.engine.connect() as connection:
+        connection.execution_options(isolation_level='AUTOCOMMIT').execute(text('ANALYZE'))
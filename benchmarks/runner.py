@@ -0,0 +1,222 @@
+"""Drive the app's routes through the Flask test client and measure them.
+
+Every route is requested `requests` times from `concurrency` threads.
+Latency percentiles and throughput are measured client side; the number of
+SQL statements per request is read from the Server-Timing header set by
+instrumentation.py.
+"""
+import random
+import re
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+Route = namedtuple('Route', 'name method path data')
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+# Most statements a single request of each read route may issue. These must
+# hold whatever the size of the data set. The listings and searches read
+# their genre facets with a second, unnest/GROUP BY statement; /venues and
+# /artists only issue those two until the listing snapshot is built.
+QUERY_BUDGETS = {
+    'index': 0,
+    'venues': 2,
+    'artists': 2,
+    'shows': 1,
+    'shows_calendar': 1,
+    'show_venue': 1,
+    'show_artist': 1,
+    'search_venues': 2,
+    'search_artists': 2,
+    'edit_venue': 1,
+    'edit_artist': 1,
+    'create_venue_form': 0,
+    'create_artist_form': 0,
+    'create_shows': 0,
+}
+
+VENUE_FORM = {
+    'city': 'Austin', 'state': 'TX', 'address': '1 Bench Street', 'phone': '555-555-5555',
+    'genres': 'Jazz', 'facebook_link': 'https://www.facebook.com/bench',
+    'image_link': 'https://images.example.com/bench.jpg', 'website_link': 'https://example.com',
+    'seeking_description': '',
+}
+
+ARTIST_FORM = dict(VENUE_FORM)
+del ARTIST_FORM['address']
+
+MONTHS = ('2025-12', '2026-04', '2026-10', '2027-02')
+
+def read_routes(db, rng, samples=20):
+    """GET routes plus the searches, with ids sampled from the database."""
+    from models import Venue, Artist
+
+    venue_ids = [venue_id for venue_id, in db.session.query(Venue.id).order_by(db.func.random()).limit(samples)]
+    artist_ids = [artist_id for artist_id, in db.session.query(Artist.id).order_by(db.func.random()).limit(samples)]
+    db.session.remove()
+
+    routes = [
+        lambda: Route('index', 'GET', '/', None),
+        lambda: Route('venues', 'GET', '/venues', None),
+        lambda: Route('artists', 'GET', '/artists', None),
+        lambda: Route('shows', 'GET', '/shows', None),
+        lambda: Route('shows_calendar', 'GET', '/shows/calendar?month={}'.format(rng.choice(MONTHS)), None),
+        lambda: Route('shows', 'GET', '/shows?from={}-01&to={}-28'.format(*[rng.choice(MONTHS)] * 2), None),
+        lambda: Route('create_venue_form', 'GET', '/venues/create', None),
+        lambda: Route('create_artist_form', 'GET', '/artists/create', None),
+        lambda: Route('create_shows', 'GET', '/shows/create', None),
+        lambda: Route('search_venues', 'POST', '/venues/search', {'search_term': rng.choice(('blue', 'hall', 'Austin, TX', 'velvet echo'))}),
+        lambda: Route('search_artists', 'POST', '/artists/search', {'search_term': rng.choice(('red', 'wolves', 'Seattle, WA', 'wild saints'))}),
+    ]
+    if venue_ids:
+        routes += [
+            lambda: Route('show_venue', 'GET', '/venues/{}'.format(rng.choice(venue_ids)), None),
+            lambda: Route('edit_venue', 'GET', '/venues/{}/edit'.format(rng.choice(venue_ids)), None),
+        ]
+    if artist_ids:
+        routes += [
+            lambda: Route('show_artist', 'GET', '/artists/{}'.format(rng.choice(artist_ids)), None),
+            lambda: Route('edit_artist', 'GET', '/artists/{}/edit'.format(rng.choice(artist_ids)), None),
+        ]
+    return routes
+
+def write_cycle(client, db):
+    """Create, edit, book and delete a throwaway venue and artist.
+
+    Yields (route name, response, seconds) for each step.
+    """
+    from models import Venue, Artist
+
+    def timed(name, method, path, data):
+        started = time.perf_counter()
+        response = client.open(path, method=method, data=data)
+        return name, response, time.perf_counter() - started
+
+    tag = uuid.uuid4().hex[:12]
+    yield timed('create_venue_submission', 'POST', '/venues/create', dict(VENUE_FORM, name='Bench venue ' + tag))
+    yield timed('create_artist_submission', 'POST', '/artists/create', dict(ARTIST_FORM, name='Bench artist ' + tag))
+
+    venue_id = db.session.query(Venue.id).filter(Venue.name == 'Bench venue ' + tag).scalar()
+    artist_id = db.session.query(Artist.id).filter(Artist.name == 'Bench artist ' + tag).scalar()
+    db.session.remove()
+    if venue_id is None or artist_id is None:
+        return
+
+    yield timed('edit_venue_submission', 'POST', '/venues/{}/edit'.format(venue_id), dict(VENUE_FORM, name='Bench venue ' + tag))
+    yield timed('edit_artist_submission', 'POST', '/artists/{}/edit'.format(artist_id), dict(ARTIST_FORM, name='Bench artist ' + tag))
+    yield timed('create_show_submission', 'POST', '/shows/create', {
+        'venue_id': venue_id, 'artist_id': artist_id, 'start_time': '2099-01-01 20:00:00'
+    })
+    yield timed('delete_venue', 'POST', '/venues/{}/delete'.format(venue_id), None)
+    yield timed('delete_artist', 'DELETE', '/artist/{}'.format(artist_id), None)
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+def _query_count(response):
+    match = SERVER_TIMING_QUERIES.search(response.headers.get('Server-Timing', ''))
+    return int(match.group(1)) if match else None
+
+def run(app, db, requests=100, concurrency=4, writes=False, seed=1):
+    """Benchmark every route; returns {route name: stats} plus '_pool'."""
+    # A lazy load a route's loading profile missed fails the route (a 500).
+    strict_loading = app.config.get('STRICT_LOADING')
+    app.config['STRICT_LOADING'] = True
+    try:
+        return _run(app, db, requests, concurrency, writes, seed)
+    finally:
+        app.config['STRICT_LOADING'] = strict_loading
+
+def _run(app, db, requests, concurrency, writes, seed):
+    from pool import pool_status
+
+    rng = random.Random(seed)
+    with app.app_context():
+        routes = read_routes(db, rng)
+
+    samples = {}
+
+    def record(name, response, seconds):
+        entry = samples.setdefault(name, {'latencies': [], 'queries': [], 'errors': 0})
+        entry['latencies'].append(seconds)
+        queries = _query_count(response)
+        if queries is not None:
+            entry['queries'].append(queries)
+        if response.status_code >= 500:
+            entry['errors'] += 1
+
+    def worker(jobs):
+        client = app.test_client()
+        for make_route in jobs:
+            route = make_route()
+            started = time.perf_counter()
+            response = client.open(route.path, method=route.method, data=route.data)
+            record(route.name, response, time.perf_counter() - started)
+
+    def write_worker(cycles):
+        client = app.test_client()
+        with app.app_context():
+            for _ in range(cycles):
+                for name, response, seconds in write_cycle(client, db):
+                    record(name, response, seconds)
+
+    jobs = [route for route in routes for _ in range(requests)]
+    rng.shuffle(jobs)
+    batches = [jobs[index::concurrency] for index in range(concurrency)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(worker, batch) for batch in batches]
+        if writes:
+            futures += [executor.submit(write_worker, max(1, requests // concurrency)) for _ in range(concurrency)]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    results = {}
+    for name, entry in sorted(samples.items()):
+        latencies = entry['latencies']
+        results[name] = {
+            'requests': len(latencies),
+            'errors': entry['errors'],
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'throughput_rps': len(latencies) / elapsed,
+            'max_queries': max(entry['queries']) if entry['queries'] else None,
+        }
+
+    with app.app_context():
+        results['_pool'] = pool_status(db.engine)
+    return results
+
+def compare(results, baseline, tolerance=0.2):
+    """List regressions against a stored baseline and the query budgets."""
+    regressions = []
+
+    checked_out = results.get('_pool', {}).get('checkedout')
+    if checked_out:
+        regressions.append('pool: {} connections still checked out after the run'.format(checked_out))
+
+    for name, stats in results.items():
+        if name.startswith('_'):
+            continue
+        if stats['errors']:
+            regressions.append('{}: {} server errors'.format(name, stats['errors']))
+
+        budget = QUERY_BUDGETS.get(name)
+        if budget is not None and stats['max_queries'] is not None and stats['max_queries'] > budget:
+            regressions.append('{}: {} queries per request, budget is {}'.format(name, stats['max_queries'], budget))
+
+        base = baseline.get(name)
+        if not base:
+            continue
+        if stats['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append('{}: p95 {:.1f} ms, baseline {:.1f} ms'.format(name, stats['p95_ms'], base['p95_ms']))
+        if (stats['max_queries'] or 0) > (base.get('max_queries') or 0):
+            regressions.append('{}: {} queries per request, baseline {}'.format(name, stats['max_queries'], base['max_queries']))
+
+    return regressions
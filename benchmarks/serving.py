@@ -0,0 +1,109 @@
+"""Benchmark: the ASGI read routes against the WSGI app under load.
+
+Start both servers on the same seeded database first, e.g.
+
+    gunicorn --workers 4 --threads 8 --bind :8000 app:app
+    uvicorn asgi:application --workers 4 --port 8001
+
+then
+
+    python -m benchmarks.serving --wsgi http://localhost:8000 --asgi http://localhost:8001 [--clients 200] [--seconds 30]
+
+Each client thread keeps one connection open and requests the routes of
+asgi.ASYNC_ENDPOINTS round-robin for --seconds; requests per second,
+latency percentiles and errors are reported per server.
+"""
+import argparse
+import http.client
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks.runner import Route, percentile, read_routes
+
+def api_routes(rng):
+    """Pages of the JSON API listings."""
+    return [
+        lambda: Route('api.list_resource', 'GET', '/api/v1/{}?limit=50&cursor={}'.format(
+            rng.choice(('venues', 'artists', 'shows')), rng.randrange(100)), None),
+    ]
+
+def _client(base_url, routes, deadline, latencies, errors):
+    url = urlsplit(base_url)
+    connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+    index = random.randrange(len(routes))
+    while time.perf_counter() < deadline:
+        route = routes[index % len(routes)]()
+        index += 1
+        body = urlencode(route.data, doseq=True) if route.data else None
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'} if body else {}
+        started = time.perf_counter()
+        try:
+            connection.request(route.method, route.path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            ok = response.status < 400
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            ok = False
+        if ok:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors.append(route.name)
+    connection.close()
+
+def load(base_url, routes, clients=200, seconds=30):
+    latencies = []
+    errors = []
+    deadline = time.perf_counter() + seconds
+    threads = [
+        threading.Thread(target=_client, args=(base_url, routes, deadline, latencies, errors))
+        for _ in range(clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'throughput_rps': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 0.5) * 1000 if latencies else 0.0,
+        'p95_ms': percentile(latencies, 0.95) * 1000 if latencies else 0.0,
+    }
+
+def run(app, db, wsgi_url, asgi_url, clients=200, seconds=30, seed=1):
+    from asgi import ASYNC_ENDPOINTS
+
+    rng = random.Random(seed)
+    with app.app_context():
+        routes = [route for route in read_routes(db, rng) + api_routes(rng) if route().name in ASYNC_ENDPOINTS]
+
+    results = {}
+    for name, base_url in (('wsgi', wsgi_url), ('asgi', asgi_url)):
+        results[name] = stats = load(base_url, routes, clients, seconds)
+        print('{:<5} {requests:>8} requests  {throughput_rps:>8.1f} req/s  p50 {p50_ms:>7.1f} ms  '
+              'p95 {p95_ms:>7.1f} ms  {errors} errors'.format(name, **stats))
+
+    if results['wsgi']['throughput_rps']:
+        print('asgi/wsgi throughput: {:.2f}x'.format(
+            results['asgi']['throughput_rps'] / results['wsgi']['throughput_rps']))
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--wsgi', default='http://localhost:8000')
+    parser.add_argument('--asgi', default='http://localhost:8001')
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--seconds', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    from app import app, db
+    results = run(app, db, args.wsgi, args.asgi, args.clients, args.seconds, args.seed)
+    sys.exit(1 if results['asgi']['errors'] or results['wsgi']['errors'] else 0)
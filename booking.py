@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+
+import dateutil.parser
+from sqlalchemy import or_, text
+
+from app import db
+from models import Venue, Artist, Show
+from counters import refresh_show_counters
+
+#----------------------------------------------------------------------------#
+# Errors.
+#----------------------------------------------------------------------------#
+
+class BookingError(Exception):
+    """The booking request is invalid."""
+
+class BookingConflict(BookingError):
+    """The venue or the artist is already booked too close to this show."""
+
+    def __init__(self, message, show_id):
+        super(BookingConflict, self).__init__(message)
+        self.show_id = show_id
+
+#----------------------------------------------------------------------------#
+# Booking.
+#----------------------------------------------------------------------------#
+
+def _parse_id(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise BookingError('{} must be an integer'.format(name))
+
+def _parse_starttime(value):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return dateutil.parser.parse(str(value))
+    except (ValueError, OverflowError):
+        raise BookingError('start_time is not a valid date and time')
+
+def _lock(model, entity_id):
+    """SELECT ... FOR UPDATE the entity row, or fail if it does not exist."""
+    locked = db.session.query(model.id).filter(model.id == entity_id).with_for_update().scalar()
+    if locked is None:
+        raise BookingError('{} {} does not exist'.format(model.__name__, entity_id))
+
+def lock_rows(model, ids):
+    """SELECT ... FOR UPDATE the rows of `ids` in id order; returns the ids found."""
+    if not ids:
+        return set()
+    return {entity_id for entity_id, in db.session.query(
+        model.id
+    ).filter(
+        model.id.in_(ids)
+    ).order_by(
+        model.id
+    ).with_for_update()}
+
+# Shows of each candidate's venue (or artist) starting within the window of
+# it, joined per candidate on the (fk, starttime) index.
+CONFLICTS = """
+    SELECT candidate.key, show.id
+    FROM unnest(CAST(:keys AS integer[]), CAST(:entity_ids AS integer[]), CAST(:starttimes AS timestamp[]))
+        AS candidate(key, entity_id, starttime)
+    JOIN show ON show.{fk} = candidate.entity_id
+        AND show.starttime > candidate.starttime - make_interval(mins => :window)
+        AND show.starttime < candidate.starttime + make_interval(mins => :window)
+"""
+
+def find_conflicts(candidates, window_minutes=180):
+    """Existing shows too close to any of `candidates`, for batch inserts.
+
+    `candidates` are (key, venue_id, artist_id, starttime) tuples. Returns
+    {key: ('venue' or 'artist', conflicting show id)}, read in two
+    statements however many candidates there are. As with book_show(), the
+    venues and artists must be locked first for the answer to hold until
+    the commit.
+    """
+    if not candidates:
+        return {}
+    keys, venue_ids, artist_ids, starttimes = (list(column) for column in zip(*candidates))
+
+    conflicts = {}
+    for side, entity_ids in (('venue', venue_ids), ('artist', artist_ids)):
+        rows = db.session.execute(text(CONFLICTS.format(fk=side + '_id')), {
+            'keys': keys,
+            'entity_ids': entity_ids,
+            'starttimes': starttimes,
+            'window': window_minutes,
+        })
+        for key, show_id in rows:
+            conflicts.setdefault(key, (side, show_id))
+    return conflicts
+
+def book_show(artist_id, venue_id, start_time, window_minutes=180):
+    """Add a show unless its venue or artist has another show within the window.
+
+    The venue row and then the artist row are locked before the overlap
+    check, always in that order, so concurrent bookings touching the same
+    venue or artist are serialized (and cannot deadlock each other). The
+    check itself is a range query served by the (venue_id, starttime) and
+    (artist_id, starttime) indexes. The caller commits or rolls back.
+    """
+    artist_id = _parse_id(artist_id, 'artist_id')
+    venue_id = _parse_id(venue_id, 'venue_id')
+    starttime = _parse_starttime(start_time)
+    window = timedelta(minutes=window_minutes)
+
+    _lock(Venue, venue_id)
+    _lock(Artist, artist_id)
+
+    conflict = db.session.query(
+        Show.id,
+        Show.venue_id,
+        Show.starttime
+    ).filter(
+        or_(Show.venue_id == venue_id, Show.artist_id == artist_id),
+        Show.starttime > starttime - window,
+        Show.starttime < starttime + window
+    ).first()
+
+    if conflict:
+        conflict_id, conflict_venue_id, conflict_starttime = conflict
+        booked = 'Venue {}'.format(venue_id) if conflict_venue_id == venue_id else 'Artist {}'.format(artist_id)
+        raise BookingConflict('{} is already booked for a show at {:%Y-%m-%d %H:%M}'.format(
+            booked, conflict_starttime), conflict_id)
+
+    show = Show(artist_id=artist_id, venue_id=venue_id, starttime=starttime)
+    db.session.add(show)
+    db.session.flush()
+    refresh_show_counters([venue_id], [artist_id])
+    return show
@@ -0,0 +1,132 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+#----------------------------------------------------------------------------#
+# Backends.
+#----------------------------------------------------------------------------#
+
+class MemoryCache(object):
+    """In-process cache with per-entry TTL and LRU eviction."""
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            'backend': 'memory',
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+class RedisCache(object):
+    """Cache backed by a (local) Redis server.
+
+    TTLs are enforced by Redis; LRU eviction is left to the server's
+    maxmemory-policy, and its evicted_keys counter is reported as evictions.
+    """
+
+    def __init__(self, url, ttl=300, prefix='fyyur:'):
+        import redis
+
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, key):
+        value = self._redis.get(self.prefix + key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pickle.loads(value)
+
+    def set(self, key, value):
+        self._redis.setex(self.prefix + key, self.ttl, pickle.dumps(value))
+
+    def delete(self, *keys):
+        if keys:
+            self._redis.delete(*[self.prefix + key for key in keys])
+
+    def clear(self):
+        keys = list(self._redis.scan_iter(self.prefix + '*'))
+        if keys:
+            self._redis.delete(*keys)
+
+    def stats(self):
+        return {
+            'backend': 'redis',
+            'entries': sum(1 for _ in self._redis.scan_iter(self.prefix + '*')),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self._redis.info('stats').get('evicted_keys', 0)
+        }
+
+#----------------------------------------------------------------------------#
+# Helpers.
+#----------------------------------------------------------------------------#
+
+def make_cache(config):
+    """Build the cache backend selected by CACHE_BACKEND."""
+    backend = config.get('CACHE_BACKEND', 'memory')
+    ttl = config.get('CACHE_TTL', 300)
+
+    if backend == 'redis':
+        return RedisCache(config['CACHE_REDIS_URL'], ttl=ttl)
+    if backend == 'memory':
+        return MemoryCache(config.get('CACHE_MAX_ENTRIES', 1024), ttl=ttl)
+    raise ValueError('Unknown CACHE_BACKEND {!r}'.format(backend))
+
+def get_or_set(cache, key, loader, cacheable=None):
+    """Read-through lookup; `loader` results of None are not cached.
+
+    When given, `cacheable()` is asked after the load whether the result
+    may be stored.
+    """
+    value = cache.get(key)
+    if value is None:
+        value = loader()
+        if value is not None and (cacheable is None or cacheable()):
+            cache.set(key, value)
+    return value
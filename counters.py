@@ -0,0 +1,96 @@
+from datetime import datetime
+
+from sqlalchemy import and_, func, or_, select
+
+from app import db
+from models import Venue, Artist, Show
+
+#----------------------------------------------------------------------------#
+# Upcoming show counters.
+#----------------------------------------------------------------------------#
+
+# model -> the show column pointing at it
+COUNTED = (
+    (Venue, Show.venue_id),
+    (Artist, Show.artist_id),
+)
+
+def refresh_counters(model, show_fk, ids=None, now=None):
+    """Recompute upcoming_shows_count/next_show_at for `ids` (or every row).
+
+    Runs as a single UPDATE with correlated subqueries, which are served by
+    the (fk, starttime) indexes on show. Does not commit.
+    """
+    if ids is not None and not ids:
+        return
+
+    now = now or datetime.now()
+    upcoming = and_(show_fk == model.id, Show.starttime >= now)
+
+    query = db.session.query(model)
+    if ids is not None:
+        query = query.filter(model.id.in_(ids))
+
+    query.update({
+        model.upcoming_shows_count: select(func.count(Show.id)).where(upcoming).scalar_subquery(),
+        model.next_show_at: select(func.min(Show.starttime)).where(upcoming).scalar_subquery(),
+    }, synchronize_session=False)
+
+def refresh_show_counters(venue_ids=(), artist_ids=(), now=None):
+    refresh_counters(Venue, Show.venue_id, list(venue_ids), now)
+    refresh_counters(Artist, Show.artist_id, list(artist_ids), now)
+
+def roll_forward(now=None):
+    """Refresh the entities whose next show has started since the last run.
+
+    Returns the number of venues and artists refreshed. Meant to be run
+    periodically (e.g. every minute from cron).
+    """
+    now = now or datetime.now()
+    refreshed = 0
+
+    for model, show_fk in COUNTED:
+        ids = [entity_id for entity_id, in db.session.query(model.id).filter(model.next_show_at < now)]
+        refresh_counters(model, show_fk, ids, now)
+        refreshed += len(ids)
+
+    db.session.commit()
+    return refreshed
+
+def counter_drift(now=None):
+    """Compare the stored counters with a from-scratch recount.
+
+    Returns a list of (table, id, stored count, actual count, stored next
+    show, actual next show) for every row that disagrees.
+    """
+    now = now or datetime.now()
+    drift = []
+
+    for model, show_fk in COUNTED:
+        upcoming = db.session.query(
+            show_fk.label('id'),
+            func.count(Show.id).label('count'),
+            func.min(Show.starttime).label('next_show_at')
+        ).filter(
+            Show.starttime >= now
+        ).group_by(
+            show_fk
+        ).subquery()
+
+        actual_count = func.coalesce(upcoming.c.count, 0)
+        rows = db.session.query(
+            model.id,
+            model.upcoming_shows_count,
+            actual_count,
+            model.next_show_at,
+            upcoming.c.next_show_at
+        ).outerjoin(
+            upcoming, upcoming.c.id == model.id
+        ).filter(or_(
+            model.upcoming_shows_count != actual_count,
+            model.next_show_at.is_distinct_from(upcoming.c.next_show_at)
+        )).all()
+
+        drift.extend((model.__tablename__,) + tuple(row) for row in rows)
+
+    return drift
@@ -0,0 +1,81 @@
+import json
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+#----------------------------------------------------------------------------#
+# Query plan checks.
+#----------------------------------------------------------------------------#
+
+# Tables whose sequential scans are reported.
+CHECKED_TABLES = {'venue', 'artist', 'show'}
+
+# Routes that list a whole table are expected to read all of it.
+SEQ_SCAN_ALLOWED = {
+    '/venues': {'venue'},
+    '/artists': {'artist'},
+}
+
+@contextmanager
+def capture_statements(engine):
+    """Collect every SELECT the engine sends while the block runs."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+def seq_scans(plan):
+    """Relation names read by a Seq Scan anywhere in a JSON plan node."""
+    found = set()
+    if plan.get('Node Type') == 'Seq Scan':
+        found.add(plan.get('Relation Name'))
+    for child in plan.get('Plans', []):
+        found |= seq_scans(child)
+    return found
+
+def explain(engine, statement, parameters, enable_seqscan=True):
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        if not enable_seqscan:
+            # Rolled back with the transaction when the connection is returned.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + statement, parameters)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]['Plan']
+    finally:
+        connection.close()
+
+def check_route_plans(app, engine, routes, enable_seqscan=True):
+    """Request each route and EXPLAIN the SELECTs it issued.
+
+    `routes` is a list of (method, path, form data) tuples. Returns a list of
+    (path, table, statement) for every unexpected sequential scan. Only
+    meaningful on a seeded, analyzed database large enough for the planner
+    to prefer indexes, unless `enable_seqscan` is False: the planner then
+    picks a sequential scan only where no index can serve the query, which
+    holds on a database of any size.
+    """
+    failures = []
+    client = app.test_client()
+
+    for method, path, data in routes:
+        with capture_statements(engine) as statements:
+            client.open(path, method=method, data=data)
+
+        allowed = SEQ_SCAN_ALLOWED.get(path, set())
+        for statement, parameters in statements:
+            tables = seq_scans(explain(engine, statement, parameters, enable_seqscan)) & CHECKED_TABLES
+            for table in sorted(tables - allowed):
+                failures.append((path, table, statement))
+
+    return failures
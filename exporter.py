@@ -0,0 +1,170 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from app import db
+from models import Venue, Artist, Show
+
+EXPORTS = {
+    'venues': Venue,
+    'artists': Artist,
+    'shows': Show,
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+#----------------------------------------------------------------------------#
+# Reading.
+#----------------------------------------------------------------------------#
+
+def iter_chunks(model, chunk_size):
+    """Yield lists of at most `chunk_size` row tuples of `model`'s table.
+
+    Rows are fetched through a server-side cursor (stream_results), so only
+    one chunk is ever held in memory, however large the table is.
+    """
+    query = db.session.query(
+        *model.__table__.columns
+    ).order_by(
+        model.id
+    ).execution_options(
+        stream_results=True
+    ).yield_per(chunk_size)
+
+    chunk = []
+    for row in query:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+#----------------------------------------------------------------------------#
+# Writers.
+#----------------------------------------------------------------------------#
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError('{!r} is not JSON serializable'.format(value))
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return ','.join(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def export_csv(model, chunks):
+    names = [column.name for column in model.__table__.columns]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(names)
+    for chunk in chunks:
+        writer.writerows([_csv_value(value) for value in row] for row in chunk)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def export_jsonl(model, chunks):
+    names = [column.name for column in model.__table__.columns]
+    for chunk in chunks:
+        yield ''.join(
+            json.dumps(dict(zip(names, row)), default=_json_default) + '\n' for row in chunk
+        ).encode('utf-8')
+
+class _DrainingSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain.
+
+    tell() keeps counting across drains, which the Parquet writer relies on
+    for the offsets in the file footer.
+    """
+
+    def __init__(self):
+        self._pending = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._pending.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._pending)
+        self._pending = []
+        return data
+
+def _arrow_schema(model):
+    import pyarrow as pa
+
+    types = []
+    for column in model.__table__.columns:
+        python_type = column.type.python_type
+        if python_type is int:
+            arrow_type = pa.int64()
+        elif python_type is bool:
+            arrow_type = pa.bool_()
+        elif python_type is datetime:
+            arrow_type = pa.timestamp('us')
+        elif python_type is list:
+            arrow_type = pa.list_(pa.string())
+        else:
+            arrow_type = pa.string()
+        types.append((column.name, arrow_type))
+    return pa.schema(types)
+
+def export_parquet(model, chunks):
+    """One Parquet row group per chunk; needs the optional pyarrow package."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(model)
+    sink = _DrainingSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema)
+
+    for chunk in chunks:
+        columns = list(zip(*chunk))
+        writer.write_table(pa.Table.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+            schema=schema
+        ))
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
+
+WRITERS = {
+    'csv': export_csv,
+    'jsonl': export_jsonl,
+    'parquet': export_parquet,
+}
+
+def format_available(format):
+    if format != 'parquet':
+        return True
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        return False
+    return True
+
+def export_table(kind, format, chunk_size=5000):
+    """Generator of encoded byte chunks for exporting `kind` as `format`."""
+    model = EXPORTS[kind]
+    return WRITERS[format](model, iter_chunks(model, chunk_size))
@@ -0,0 +1,41 @@
+from sqlalchemy import func
+
+from app import db
+
+#----------------------------------------------------------------------------#
+# Genre facets.
+#----------------------------------------------------------------------------#
+
+def genre_criteria(model, genres, match='all'):
+    """Filter criteria for `model` rows tagged with all or any of `genres`.
+
+    'all' compiles to genres @> ARRAY[...] and 'any' to genres && ARRAY[...];
+    both are answered by the GIN index on genres.
+    """
+    if not genres:
+        return []
+    if match == 'any':
+        return [model.genres.overlap(list(genres))]
+    return [model.genres.contains(list(genres))]
+
+def genre_facets(model, criteria=()):
+    """(genre, count) pairs over the `model` rows matching `criteria`.
+
+    Computed in one statement: the matching rows' genres are unnested and
+    grouped. Most common genres come first.
+    """
+    genres = db.session.query(
+        func.unnest(model.genres).label('genre')
+    ).filter(
+        *criteria
+    ).subquery()
+
+    count = func.count()
+    return db.session.query(
+        genres.c.genre,
+        count
+    ).group_by(
+        genres.c.genre
+    ).order_by(
+        count.desc(), genres.c.genre
+    ).all()
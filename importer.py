@@ -0,0 +1,237 @@
+import csv
+import json
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+
+import dateutil.parser
+
+from app import db
+from models import Venue, Artist, Show
+from counters import refresh_show_counters
+from booking import find_conflicts, lock_rows
+
+#----------------------------------------------------------------------------#
+# Field parsers.
+#----------------------------------------------------------------------------#
+
+def _text(value):
+    value = str(value).strip()
+    return value or None
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('y', 'yes', 'true', '1')
+
+def _genres(value):
+    if isinstance(value, list):
+        return [str(genre).strip() for genre in value]
+    return [genre.strip() for genre in str(value).split(',') if genre.strip()]
+
+def _int(value):
+    return int(value)
+
+def _datetime(value):
+    return dateutil.parser.parse(str(value))
+
+# kind -> (model, {column: parser}, required columns, {alias: column})
+IMPORTS = {
+    'venues': (Venue, {
+        'name': _text, 'genres': _genres, 'address': _text, 'city': _text,
+        'state': _text, 'phone': _text, 'website': _text, 'facebook_link': _text,
+        'seeking_talent': _bool, 'seeking_description': _text, 'image_link': _text,
+    }, ('name', 'city', 'state'), {'website_link': 'website'}),
+    'artists': (Artist, {
+        'name': _text, 'genres': _genres, 'city': _text, 'state': _text,
+        'phone': _text, 'website': _text, 'facebook_link': _text,
+        'seeking_venue': _bool, 'seeking_description': _text, 'image_link': _text,
+    }, ('name',), {'website_link': 'website'}),
+    'shows': (Show, {
+        'venue_id': _int, 'artist_id': _int, 'starttime': _datetime,
+    }, ('venue_id', 'artist_id', 'starttime'), {'start_time': 'starttime'}),
+}
+
+#----------------------------------------------------------------------------#
+# Reading.
+#----------------------------------------------------------------------------#
+
+def read_records(stream, format):
+    """Yield (line number, record dict) from a CSV or JSONL text stream."""
+    if format == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+    elif format == 'jsonl':
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as error:
+                record = error
+            yield line_number, record
+    else:
+        raise ValueError('Unsupported import format {!r}'.format(format))
+
+def guess_format(filename):
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+#----------------------------------------------------------------------------#
+# Import.
+#----------------------------------------------------------------------------#
+
+class ImportReport(object):
+    """Row counts plus the first `max_errors` row-level errors."""
+
+    def __init__(self, max_errors=100):
+        self.max_errors = max_errors
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line_number, message):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line_number, 'error': message})
+
+    def to_dict(self):
+        return {
+            'inserted': self.inserted,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors)
+        }
+
+def _parse(record, parsers, required, aliases):
+    if isinstance(record, ValueError):
+        raise ValueError('invalid JSON: {}'.format(record))
+    if not isinstance(record, dict):
+        raise ValueError('expected an object, got {!r}'.format(record))
+
+    # Every row carries every column so the chunk can be executemany'd.
+    row = dict.fromkeys(parsers)
+    for key, value in record.items():
+        column = aliases.get(key, key)
+        if column in parsers and value not in (None, ''):
+            row[column] = parsers[column](value)
+
+    missing = [column for column in required if row.get(column) is None]
+    if missing:
+        raise ValueError('missing {}'.format(', '.join(missing)))
+    return row
+
+def _check_foreign_keys(rows, report):
+    """Drop shows whose venue or artist does not exist, in two queries per chunk.
+
+    The venues and then the artists found are locked, as book_show() locks
+    them, so bookings of the same venues and artists wait for the chunk.
+    """
+    venue_ids = lock_rows(Venue, {row['venue_id'] for _, row in rows})
+    artist_ids = lock_rows(Artist, {row['artist_id'] for _, row in rows})
+
+    valid = []
+    for line_number, row in rows:
+        if row['venue_id'] not in venue_ids:
+            report.error(line_number, 'venue {} does not exist'.format(row['venue_id']))
+        elif row['artist_id'] not in artist_ids:
+            report.error(line_number, 'artist {} does not exist'.format(row['artist_id']))
+        else:
+            valid.append((line_number, row))
+    return valid
+
+def _near(starttimes, starttime, window):
+    index = bisect_left(starttimes, starttime)
+    return any(abs(other - starttime) < window for other in starttimes[max(0, index - 1):index + 1])
+
+def _check_overlaps(rows, report, window_minutes):
+    """Drop shows within the booking window of another show of their venue or artist.
+
+    Existing shows are found by booking.find_conflicts(); rows of the chunk
+    are checked against the ones accepted before them.
+    """
+    window = timedelta(minutes=window_minutes)
+    conflicts = find_conflicts(
+        [(line_number, row['venue_id'], row['artist_id'], row['starttime']) for line_number, row in rows],
+        window_minutes)
+
+    accepted = defaultdict(list)
+    valid = []
+    for line_number, row in rows:
+        if line_number in conflicts:
+            side, show_id = conflicts[line_number]
+            report.error(line_number, '{} {} is already booked within the window (show {})'.format(
+                side, row[side + '_id'], show_id))
+            continue
+
+        sides = [('venue', row['venue_id']), ('artist', row['artist_id'])]
+        clash = [side for side in sides if _near(accepted[side], row['starttime'], window)]
+        if clash:
+            report.error(line_number, '{} {} is already booked within the window by an earlier row'.format(*clash[0]))
+            continue
+
+        for side in sides:
+            insort(accepted[side], row['starttime'])
+        valid.append((line_number, row))
+    return valid
+
+def _insert(table, rows, report):
+    """executemany the chunk; on failure, retry row by row to isolate bad rows.
+
+    Failures only roll back to a savepoint, so locks taken for the chunk
+    are held until its commit.
+    """
+    try:
+        with db.session.begin_nested():
+            db.session.execute(table.insert(), [row for _, row in rows])
+        report.inserted += len(rows)
+    except Exception:
+        for line_number, row in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(table.insert(), [row])
+                report.inserted += 1
+            except Exception as error:
+                report.error(line_number, str(getattr(error, 'orig', error)).strip())
+    db.session.commit()
+
+def import_records(kind, stream, format='csv', chunk_size=1000, max_errors=100, window_minutes=180):
+    """Stream records into `kind` ('venues', 'artists' or 'shows').
+
+    Records are read, validated and inserted `chunk_size` at a time, so
+    memory stays bounded by the chunk size whatever the file size. Invalid
+    rows are reported and skipped; the rest of the batch still goes in.
+    Shows are held to the same booking window as book_show().
+    """
+    model, parsers, required, aliases = IMPORTS[kind]
+    report = ImportReport(max_errors)
+    records = read_records(stream, format)
+
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+
+        rows = []
+        for line_number, record in chunk:
+            try:
+                rows.append((line_number, _parse(record, parsers, required, aliases)))
+            except (TypeError, ValueError, OverflowError) as error:
+                report.error(line_number, str(error))
+
+        if model is Show:
+            rows = _check_foreign_keys(rows, report)
+            rows = _check_overlaps(rows, report, window_minutes)
+        if rows:
+            _insert(model.__table__, rows, report)
+        else:
+            # Ends the chunk's transaction and with it any locks.
+            db.session.commit()
+        if model is Show and rows:
+            refresh_show_counters(
+                {row['venue_id'] for _, row in rows},
+                {row['artist_id'] for _, row in rows})
+            db.session.commit()
+
+    return report
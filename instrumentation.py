@@ -0,0 +1,142 @@
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, g, has_request_context, request
+from flask.signals import before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+#----------------------------------------------------------------------------#
+# Histograms.
+#----------------------------------------------------------------------------#
+
+class Histogram(object):
+    """Prometheus-style cumulative histogram, labelled by endpoint."""
+
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, value):
+        with self._lock:
+            counts, total = self._series.get(endpoint, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect_left(self.buckets, value)] += 1
+            self._series[endpoint] = (counts, total + value)
+
+    def render(self):
+        lines = [
+            '# HELP {} {}'.format(self.name, self.help),
+            '# TYPE {} histogram'.format(self.name),
+        ]
+        with self._lock:
+            series = sorted(self._series.items())
+        for endpoint, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append('{}_bucket{{endpoint="{}",le="{}"}} {}'.format(self.name, endpoint, bound, cumulative))
+            lines.append('{}_sum{{endpoint="{}"}} {}'.format(self.name, endpoint, total))
+            lines.append('{}_count{{endpoint="{}"}} {}'.format(self.name, endpoint, cumulative))
+        return '\n'.join(lines)
+
+SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+#----------------------------------------------------------------------------#
+# Instrumentation.
+#----------------------------------------------------------------------------#
+
+class Instrumentation(object):
+    """Per-request latency, template and SQL timings.
+
+    Each response gets a Server-Timing header, statements slower than
+    SLOW_QUERY_THRESHOLD_MS are logged with their route, and per-endpoint
+    histograms are served in Prometheus text format at /metrics.
+    """
+
+    def __init__(self, app=None):
+        self.request_duration = Histogram(
+            'fyyur_request_duration_seconds', 'Total request latency.', SECONDS)
+        self.template_duration = Histogram(
+            'fyyur_template_render_seconds', 'Time spent rendering templates per request.', SECONDS)
+        self.sql_duration = Histogram(
+            'fyyur_sql_duration_seconds', 'Time spent in SQL statements per request.', SECONDS)
+        self.sql_statements = Histogram(
+            'fyyur_sql_statements', 'SQL statements issued per request.', (0, 1, 2, 5, 10, 25, 50, 100))
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.slow_query_threshold = app.config.get('SLOW_QUERY_THRESHOLD_MS', 200) / 1000.0
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.add_url_rule('/metrics', 'metrics', self.metrics)
+
+    def _before_request(self):
+        g.request_started = time.perf_counter()
+        g.sql_count = 0
+        g.sql_time = 0.0
+        g.template_time = 0.0
+        g.template_stack = []
+
+    def _after_request(self, response):
+        started = g.get('request_started')
+        if started is None:
+            return response
+
+        total = time.perf_counter() - started
+        endpoint = request.endpoint or 'unmatched'
+
+        self.request_duration.observe(endpoint, total)
+        self.template_duration.observe(endpoint, g.template_time)
+        self.sql_duration.observe(endpoint, g.sql_time)
+        self.sql_statements.observe(endpoint, g.sql_count)
+
+        response.headers['Server-Timing'] = ', '.join([
+            'app;dur={:.1f}'.format(total * 1000),
+            'db;dur={:.1f};desc="{} queries"'.format(g.sql_time * 1000, g.sql_count),
+            'tpl;dur={:.1f}'.format(g.template_time * 1000),
+        ])
+        return response
+
+    def _before_render(self, sender, template, context, **extra):
+        if has_request_context() and 'template_stack' in g:
+            g.template_stack.append(time.perf_counter())
+
+    def _after_render(self, sender, template, context, **extra):
+        if has_request_context() and g.get('template_stack'):
+            g.template_time += time.perf_counter() - g.template_stack.pop()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Kept on the statement's own context: one that raises never reaches
+        # after_cursor_execute, so nothing is left behind on the connection.
+        context._query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_started
+
+        route = None
+        if has_request_context():
+            route = request.endpoint
+            if 'sql_count' in g:
+                g.sql_count += 1
+                g.sql_time += elapsed
+
+        if elapsed >= self.slow_query_threshold:
+            self.app.logger.warning('Slow query ({:.0f} ms) in {}: {}'.format(
+                elapsed * 1000, route or 'no request', ' '.join(statement.split())))
+
+    def metrics(self):
+        body = '\n'.join(histogram.render() for histogram in (
+            self.request_duration, self.template_duration, self.sql_duration, self.sql_statements
+        ))
+        return Response(body + '\n', mimetype='text/plain; version=0.0.4')
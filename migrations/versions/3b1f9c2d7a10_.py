@@ -0,0 +1,50 @@
+"""search indexes for venues and artists
+
+Revision ID: 3b1f9c2d7a10
+Revises: f275d8dc377a
+Create Date: 2026-10-18 09:12:44.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b1f9c2d7a10'
+down_revision = 'f275d8dc377a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # array_to_string() is only STABLE, so the document is wrapped in an
+    # IMMUTABLE function to make it usable in an expression index.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fyyur_search_vector(
+            name varchar, city varchar, state varchar, genres varchar[]
+        ) RETURNS tsvector LANGUAGE sql IMMUTABLE AS $$
+            SELECT setweight(to_tsvector('simple', coalesce(name, '')), 'A')
+                || setweight(to_tsvector('simple', coalesce(city, '') || ' ' || coalesce(state, '')), 'B')
+                || setweight(to_tsvector('simple', coalesce(array_to_string(genres, ' '), '')), 'C')
+        $$
+    """)
+
+    for table in ('venue', 'artist'):
+        op.execute(
+            'CREATE INDEX ix_{0}_search_vector ON {0} '
+            'USING gin (fyyur_search_vector(name, city, state, genres))'.format(table)
+        )
+        for column in ('name', 'city', 'state'):
+            op.create_index('ix_{}_{}_trgm'.format(table, column), table, [column],
+                postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
+
+
+def downgrade():
+    for table in ('artist', 'venue'):
+        for column in ('state', 'city', 'name'):
+            op.drop_index('ix_{}_{}_trgm'.format(table, column), table_name=table)
+        op.drop_index('ix_{}_search_vector'.format(table), table_name=table)
+
+    op.execute('DROP FUNCTION IF EXISTS fyyur_search_vector(varchar, varchar, varchar, varchar[])')
@@ -0,0 +1,27 @@
+"""gin indexes on genres
+
+Revision ID: 4f8a2c6e1b37
+Revises: 5d2a7e9c4f13
+Create Date: 2026-10-18 17:25:44.118093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f8a2c6e1b37'
+down_revision = '5d2a7e9c4f13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ?genre= filters: genres @> ARRAY[...] and genres && ARRAY[...]
+    op.create_index('ix_venue_genres', 'venue', ['genres'], postgresql_using='gin')
+    op.create_index('ix_artist_genres', 'artist', ['genres'], postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_artist_genres', table_name='artist')
+    op.drop_index('ix_venue_genres', table_name='venue')
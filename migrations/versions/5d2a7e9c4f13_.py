@@ -0,0 +1,45 @@
+"""materialized upcoming show counters on venue and artist
+
+Revision ID: 5d2a7e9c4f13
+Revises: 8c4e1a6f0b52
+Create Date: 2026-10-18 13:40:05.271634
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2a7e9c4f13'
+down_revision = '8c4e1a6f0b52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table, fk in (('venue', 'venue_id'), ('artist', 'artist_id')):
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('next_show_at', sa.DateTime(), nullable=True))
+        op.create_index('ix_{}_next_show_at'.format(table), table, ['next_show_at'])
+
+        # starttime holds naive local times (the app compares it with
+        # datetime.now()), so compare with a naive timestamp, not now().
+        op.execute("""
+            UPDATE {table} SET
+                upcoming_shows_count = upcoming.count,
+                next_show_at = upcoming.next_show_at
+            FROM (
+                SELECT {fk}, count(*) AS count, min(starttime) AS next_show_at
+                FROM show
+                WHERE starttime >= LOCALTIMESTAMP
+                GROUP BY {fk}
+            ) AS upcoming
+            WHERE {table}.id = upcoming.{fk}
+        """.format(table=table, fk=fk))
+
+
+def downgrade():
+    for table in ('artist', 'venue'):
+        op.drop_index('ix_{}_next_show_at'.format(table), table_name=table)
+        op.drop_column(table, 'next_show_at')
+        op.drop_column(table, 'upcoming_shows_count')
@@ -0,0 +1,25 @@
+"""lower(city) index on venue
+
+Revision ID: 7a3d5e1f9b26
+Revises: 4f8a2c6e1b37
+Create Date: 2026-10-18 21:06:31.540218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3d5e1f9b26'
+down_revision = '4f8a2c6e1b37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # /shows?city=: lower(venue.city) = lower(?)
+    op.create_index('ix_venue_city_lower', 'venue', [sa.text('lower(city)')])
+
+
+def downgrade():
+    op.drop_index('ix_venue_city_lower', table_name='venue')
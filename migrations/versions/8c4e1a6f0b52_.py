@@ -0,0 +1,33 @@
+"""indexes for show lookups and venue areas
+
+Revision ID: 8c4e1a6f0b52
+Revises: 3b1f9c2d7a10
+Create Date: 2026-10-18 11:02:17.845120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4e1a6f0b52'
+down_revision = '3b1f9c2d7a10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # detail pages and upcoming counts: WHERE venue_id/artist_id = ? AND starttime range
+    op.create_index('ix_show_venue_id_starttime', 'show', ['venue_id', 'starttime'])
+    op.create_index('ix_show_artist_id_starttime', 'show', ['artist_id', 'starttime'])
+    # /shows timeline: ORDER BY starttime DESC, id DESC with a keyset cursor
+    op.create_index('ix_show_starttime_id', 'show', ['starttime', 'id'])
+    # /venues grouping by area
+    op.create_index('ix_venue_city_state', 'venue', ['city', 'state'])
+
+
+def downgrade():
+    op.drop_index('ix_venue_city_state', table_name='venue')
+    op.drop_index('ix_show_starttime_id', table_name='show')
+    op.drop_index('ix_show_artist_id_starttime', table_name='show')
+    op.drop_index('ix_show_venue_id_starttime', table_name='show')
@@ -1,8 +1,56 @@
 from app import db
+from flask import current_app
+from sqlalchemy import inspect
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Load
 import enum
 
-class Venue(db.Model):
+class Profiled(object):
+    """Named loading profiles: `Model.profile(name)` returns loader options.
+
+    Each entry of __profiles__ is a dict with any of
+      load_only     columns to load, every other column deferred
+      defer         columns to defer
+      selectinload  {relationship: profile of the related model}
+    Columns and relationships a profile does not load are lazy; with
+    STRICT_LOADING on they raise on access instead, so a forgotten load
+    fails loudly.
+    """
+    __profiles__ = {}
+
+    @classmethod
+    def profile(cls, name, path=None):
+        spec = cls.__profiles__[name]
+        path = path if path is not None else Load(cls)
+
+        strict = bool(current_app.config.get('STRICT_LOADING'))
+
+        options = []
+        deferred = list(spec.get('defer', ()))
+        if 'load_only' in spec:
+            options.append(path.load_only(*[getattr(cls, column) for column in spec['load_only']]))
+            if strict:
+                # load_only's own deferral would still lazy load on access.
+                deferred.extend(attribute.key for attribute in inspect(cls).column_attrs
+                    if attribute.key not in spec['load_only'])
+        options.extend(path.defer(getattr(cls, column), raiseload=strict) for column in deferred)
+        for relationship, profile in spec.get('selectinload', {}).items():
+            attribute = getattr(cls, relationship)
+            related = attribute.property.mapper.class_
+            options.extend(related.profile(profile, path.selectinload(attribute)))
+        if strict:
+            options.append(path.raiseload('*'))
+        return options
+
+class Venue(Profiled, db.Model):
     __tablename__ = 'venue'
+    __table_args__ = (
+        db.Index('ix_venue_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        db.Index('ix_venue_city_trgm', 'city', postgresql_using='gin', postgresql_ops={'city': 'gin_trgm_ops'}),
+        db.Index('ix_venue_state_trgm', 'state', postgresql_using='gin', postgresql_ops={'state': 'gin_trgm_ops'}),
+        db.Index('ix_venue_city_state', 'city', 'state'),
+        db.Index('ix_venue_genres', 'genres', postgresql_using='gin'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
@@ -15,14 +63,32 @@ class Venue(db.Model):
     website = db.Column(db.String(120))
     seeking_talent = db.Column(db.Boolean)
     seeking_description = db.Column(db.String(500))
-    genres = db.Column(db.ARRAY(db.String()))
+    genres = db.Column(ARRAY(db.String()))
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_show_at = db.Column(db.DateTime, index=True)
     shows = db.relationship('Show', backref=db.backref('venue', lazy=True), cascade="all, delete")
 
+    __profiles__ = {
+        'listing': {'load_only': ('id', 'name')},
+        'detail': {'defer': ('upcoming_shows_count', 'next_show_at')},
+        # delete cascades to the shows, so they are loaded up front
+        'delete': {'load_only': ('id', 'name'), 'selectinload': {'shows': 'listing'}},
+    }
+
     def __repr__(self):
           return '<Venue {}>'.format(self.name)
 
-class Artist(db.Model):
+# /shows?city= compares lower(city)
+db.Index('ix_venue_city_lower', db.func.lower(Venue.city))
+
+class Artist(Profiled, db.Model):
     __tablename__ = 'artist'
+    __table_args__ = (
+        db.Index('ix_artist_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        db.Index('ix_artist_city_trgm', 'city', postgresql_using='gin', postgresql_ops={'city': 'gin_trgm_ops'}),
+        db.Index('ix_artist_state_trgm', 'state', postgresql_using='gin', postgresql_ops={'state': 'gin_trgm_ops'}),
+        db.Index('ix_artist_genres', 'genres', postgresql_using='gin'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
@@ -34,14 +100,27 @@ class Artist(db.Model):
     website = db.Column(db.String(120))
     seeking_venue = db.Column(db.Boolean)
     seeking_description = db.Column(db.String(500))
-    genres = db.Column(db.ARRAY(db.String))
+    genres = db.Column(ARRAY(db.String))
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_show_at = db.Column(db.DateTime, index=True)
     shows = db.relationship('Show', backref=db.backref('artist', lazy=True), cascade="all, delete")
 
+    __profiles__ = {
+        'listing': {'load_only': ('id', 'name')},
+        'detail': {'defer': ('upcoming_shows_count', 'next_show_at')},
+        'delete': {'load_only': ('id', 'name'), 'selectinload': {'shows': 'listing'}},
+    }
+
     def __repr__(self):
           return '<Artist {}>'.format(self.name)
 
-class Show(db.Model):
+class Show(Profiled, db.Model):
     __tablename__ = 'show'
+    __table_args__ = (
+        db.Index('ix_show_venue_id_starttime', 'venue_id', 'starttime'),
+        db.Index('ix_show_artist_id_starttime', 'artist_id', 'starttime'),
+        db.Index('ix_show_starttime_id', 'starttime', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     venue_id = db.Column(db.Integer, db.ForeignKey('venue.id'),
         nullable=False)
@@ -49,5 +128,9 @@ class Show(db.Model):
         nullable=False)
     starttime = db.Column(db.DateTime, nullable=False)
 
+    __profiles__ = {
+        'listing': {'load_only': ('id', 'venue_id', 'artist_id', 'starttime')},
+    }
+
     def __repr__(self):
           return '<Show {}{}'.format(self.artist_id, self.venue_id)
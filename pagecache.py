@@ -0,0 +1,121 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Response, make_response, request, session
+
+#----------------------------------------------------------------------------#
+# Data version.
+#----------------------------------------------------------------------------#
+
+class LocalDataVersion(object):
+    """Data version counter kept in this process."""
+
+    def __init__(self):
+        self._version = 0
+        self._last_modified = _now()
+        self._lock = threading.Lock()
+
+    def get(self):
+        return self._version, self._last_modified
+
+    def bump(self):
+        with self._lock:
+            self._version += 1
+            self._last_modified = _now()
+
+class RedisDataVersion(object):
+    """Data version counter shared by every worker through Redis."""
+
+    def __init__(self, url, key='fyyur:data-version'):
+        import redis
+
+        self.key = key
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self):
+        version, last_modified = self._redis.hmget(self.key, 'version', 'last_modified')
+        if version is None:
+            return 0, datetime.fromtimestamp(0, timezone.utc)
+        return int(version), datetime.fromtimestamp(float(last_modified), timezone.utc)
+
+    def bump(self):
+        pipe = self._redis.pipeline()
+        pipe.hincrby(self.key, 'version', 1)
+        pipe.hset(self.key, 'last_modified', _now().timestamp())
+        pipe.execute()
+
+def make_data_version(config):
+    """Share the version through Redis whenever the cache backend is Redis."""
+    if config.get('CACHE_BACKEND') == 'redis':
+        return RedisDataVersion(config['CACHE_REDIS_URL'])
+    return LocalDataVersion()
+
+def _now():
+    # HTTP dates have a one second resolution.
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+#----------------------------------------------------------------------------#
+# Page cache.
+#----------------------------------------------------------------------------#
+
+CachedPage = namedtuple('CachedPage', 'version expires etag body mimetype')
+
+class PageCache(object):
+    """Rendered HTML for list pages, keyed on path and data version.
+
+    Any write bumps the data version, which makes every stored page stale.
+    Pages are also re-rendered once they are `ttl` seconds old: with a
+    per-process data version, that bounds how long a worker serves pages
+    from before another worker's write. A conditional GET whose ETag
+    matches a page rendered for the current version is answered with a 304
+    without calling the view.
+    """
+
+    def __init__(self, data_version, max_entries=256, ttl=30):
+        self.data_version = data_version
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bump(self):
+        self.data_version.bump()
+
+    def cached(self, view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Pages carrying flashed messages are personal; never share them.
+            if session.get('_flashes'):
+                return view(*args, **kwargs)
+
+            version, last_modified = self.data_version.get()
+            key = request.full_path
+
+            with self._lock:
+                page = self._pages.get(key)
+                if page is not None:
+                    self._pages.move_to_end(key)
+
+            if page is None or page.version != version or page.expires < time.monotonic():
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                body = response.get_data()
+                page = CachedPage(version, time.monotonic() + self.ttl,
+                    hashlib.sha1(body).hexdigest(), body, response.mimetype)
+                with self._lock:
+                    self._pages[key] = page
+                    while len(self._pages) > self.max_entries:
+                        self._pages.popitem(last=False)
+
+            response = Response(page.body, mimetype=page.mimetype)
+            response.set_etag(page.etag)
+            response.last_modified = last_modified
+            response.cache_control.no_cache = True
+            return response.make_conditional(request)
+
+        return wrapper
@@ -0,0 +1,28 @@
+from sqlalchemy import event, text
+
+#----------------------------------------------------------------------------#
+# Connection pool.
+#----------------------------------------------------------------------------#
+
+def set_transaction_statement_timeout(engine, timeout_ms):
+    """Apply statement_timeout with SET LOCAL at the start of every transaction.
+
+    Used behind PgBouncer in transaction mode, where the timeout can neither
+    be passed as a startup option nor set once per server connection.
+    """
+    @event.listens_for(engine, 'begin')
+    def set_timeout(connection):
+        connection.execute(text('SET LOCAL statement_timeout = {:d}'.format(timeout_ms)))
+
+def pool_status(engine):
+    """Checked-in, checked-out and overflow counts of the engine's pool."""
+    pool = engine.pool
+    status = {'pool': type(pool).__name__}
+
+    # NullPool (PgBouncer mode) keeps no connections and has no counters.
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        counter = getattr(pool, name, None)
+        if counter is not None:
+            status[name] = counter()
+
+    return status
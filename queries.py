@@ -0,0 +1,289 @@
+import calendar
+from datetime import datetime, time, timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from sqlalchemy import case, func, tuple_
+
+from app import db
+from models import Venue, Artist, Show
+from facets import genre_criteria
+
+#----------------------------------------------------------------------------#
+# Venues.
+#----------------------------------------------------------------------------#
+
+def venue_areas(criteria=()):
+    """Build the city/state -> venues -> upcoming count tree for /venues.
+
+    Everything comes back from a single statement on the venue table; the
+    upcoming counts are the materialized counters kept by counters.py, so
+    no join on show is needed. `criteria` filters the venues listed.
+    """
+    rows = db.session.query(
+        Venue.city,
+        Venue.state,
+        Venue.id,
+        Venue.name,
+        Venue.upcoming_shows_count
+    ).filter(
+        *criteria
+    ).order_by(
+        Venue.city, Venue.state, Venue.id
+    ).all()
+
+    areas = []
+    for (city, state), area_rows in groupby(rows, key=itemgetter(0, 1)):
+        areas.append({
+            "city": city,
+            "state": state,
+            "venues": [{
+                'id': venue_id,
+                'name': name,
+                'num_upcoming_shows': num_upcoming_shows
+            } for _, _, venue_id, name, num_upcoming_shows in area_rows]
+        })
+
+    return areas
+
+def show_partner_ids(show_fk, partner_fk, entity_id):
+    """Ids on the other side of an entity's shows.
+
+    e.g. show_partner_ids(Show.venue_id, Show.artist_id, 5) lists every
+    artist that has a show at venue 5.
+    """
+    return [partner_id for partner_id, in db.session.query(
+        partner_fk
+    ).filter(
+        show_fk == entity_id
+    ).distinct().all()]
+
+#----------------------------------------------------------------------------#
+# Detail pages.
+#----------------------------------------------------------------------------#
+
+def _entity_with_shows(model, entity_id, show_fk, other, other_fk, now):
+    """Fetch an entity and all of its shows, split into past and upcoming.
+
+    The entity, its shows and the performer on the other side of each show
+    come back from one statement. The past/upcoming counts are CASE
+    aggregates computed as window functions over that same statement, and
+    the rows are partitioned in a single sweep. A show starting exactly at
+    `now` counts as upcoming.
+    """
+    past_count = func.count(case((Show.starttime < now, 1))).over()
+    upcoming_count = func.count(case((Show.starttime >= now, 1))).over()
+
+    rows = db.session.query(
+        model,
+        Show.starttime,
+        other.id,
+        other.name,
+        other.image_link,
+        past_count,
+        upcoming_count
+    ).outerjoin(
+        Show, show_fk == model.id
+    ).outerjoin(
+        other, other.id == other_fk
+    ).filter(
+        model.id == entity_id
+    ).options(
+        *model.profile('detail')
+    ).order_by(
+        Show.starttime
+    ).all()
+
+    if not rows:
+        return None, [], [], 0, 0
+
+    past_shows = []
+    upcoming_shows = []
+
+    for _, starttime, other_id, other_name, other_image_link, _, _ in rows:
+        if starttime is None:
+            continue
+        record = (other_id, other_name, other_image_link, starttime)
+        if starttime < now:
+            past_shows.append(record)
+        else:
+            upcoming_shows.append(record)
+
+    entity, _, _, _, _, num_past_shows, num_upcoming_shows = rows[0]
+    return entity, past_shows, upcoming_shows, num_past_shows, num_upcoming_shows
+
+def _show_records(shows, prefix):
+    return [{
+        prefix + "_id": other_id,
+        prefix + "_name": other_name,
+        prefix + "_image_link": other_image_link,
+        "start_time": start_time
+    } for other_id, other_name, other_image_link, start_time in shows]
+
+def venue_detail(venue_id, now=None):
+    """Assemble the payload for pages/show_venue.html, or None if not found."""
+    now = now or datetime.now()
+
+    venue, past_shows, upcoming_shows, num_past_shows, num_upcoming_shows = \
+        _entity_with_shows(Venue, venue_id, Show.venue_id, Artist, Show.artist_id, now)
+
+    if not venue:
+        return None
+
+    return {
+        "id": venue.id,
+        "name": venue.name,
+        "genres": venue.genres,
+        "address": venue.address,
+        "city": venue.city,
+        "state": venue.state,
+        "phone": venue.phone,
+        "website": venue.website,
+        "facebook_link": venue.facebook_link,
+        "seeking_talent": venue.seeking_talent,
+        "seeking_description": venue.seeking_description,
+        "image_link": venue.image_link,
+        "past_shows": _show_records(past_shows, "artist"),
+        "upcoming_shows": _show_records(upcoming_shows, "artist"),
+        "past_shows_count": num_past_shows,
+        "upcoming_shows_count": num_upcoming_shows,
+    }
+
+def artist_detail(artist_id, now=None):
+    """Assemble the payload for pages/show_artist.html, or None if not found."""
+    now = now or datetime.now()
+
+    artist, past_shows, upcoming_shows, num_past_shows, num_upcoming_shows = \
+        _entity_with_shows(Artist, artist_id, Show.artist_id, Venue, Show.venue_id, now)
+
+    if not artist:
+        return None
+
+    return {
+        "id": artist.id,
+        "name": artist.name,
+        "genres": artist.genres,
+        "city": artist.city,
+        "state": artist.state,
+        "phone": artist.phone,
+        "website": artist.website,
+        "facebook_link": artist.facebook_link,
+        "seeking_venue": artist.seeking_venue,
+        "seeking_description": artist.seeking_description,
+        "image_link": artist.image_link,
+        "past_shows": _show_records(past_shows, "venue"),
+        "upcoming_shows": _show_records(upcoming_shows, "venue"),
+        "past_shows_count": num_past_shows,
+        "upcoming_shows_count": num_upcoming_shows,
+    }
+
+#----------------------------------------------------------------------------#
+# Shows.
+#----------------------------------------------------------------------------#
+
+def encode_show_cursor(starttime, show_id):
+    return '{}_{}'.format(starttime.isoformat(), show_id)
+
+def decode_show_cursor(cursor):
+    """Turn a cursor from the query string back into (starttime, id).
+
+    Raises ValueError when the cursor is malformed.
+    """
+    starttime, _, show_id = cursor.rpartition('_')
+    return datetime.fromisoformat(starttime), int(show_id)
+
+def _show_listing():
+    return db.session.query(
+        Show.id,
+        Show.starttime,
+        Venue.id,
+        Venue.name,
+        Artist.id,
+        Artist.name,
+        Artist.image_link
+    ).join(
+        Venue, Venue.id == Show.venue_id
+    ).join(
+        Artist, Artist.id == Show.artist_id
+    )
+
+def _filter_shows(query, start=None, end=None, city=None, state=None, genre=None):
+    """Narrow a show listing by the /shows filters.
+
+    `start` and `end` bound starttime as [start, end); `city` and `state`
+    match the venue and `genre` one of the artist's genres. The city is
+    compared as lower(city), which ix_venue_city_lower serves.
+    """
+    if start is not None:
+        query = query.filter(Show.starttime >= start)
+    if end is not None:
+        query = query.filter(Show.starttime < end)
+    if city:
+        query = query.filter(func.lower(Venue.city) == city.strip().lower())
+    if state:
+        query = query.filter(Venue.state == state.strip().upper())
+    if genre:
+        query = query.filter(*genre_criteria(Artist, [genre]))
+    return query
+
+def _show_records_for_listing(rows):
+    return [{
+        'venue_id': venue_id,
+        'venue_name': venue_name,
+        'artist_id': artist_id,
+        'artist_name': artist_name,
+        'artist_image_link': artist_image_link,
+        'start_time': starttime
+    } for _, starttime, venue_id, venue_name, artist_id, artist_name, artist_image_link in rows]
+
+def show_timeline(cursor=None, limit=30, **filters):
+    """Return one page of the /shows timeline and the cursor of the next one.
+
+    The page is read with a single joined query that only selects the columns
+    pages/shows.html renders, and is keyset-paginated on (starttime, id) so
+    deep pages cost the same as the first one. `filters` are the keyword
+    arguments of _filter_shows.
+    """
+    query = _filter_shows(_show_listing(), **filters)
+
+    if cursor:
+        starttime, show_id = decode_show_cursor(cursor)
+        query = query.filter(tuple_(Show.starttime, Show.id) < tuple_(starttime, show_id))
+
+    rows = query.order_by(Show.starttime.desc(), Show.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_show_cursor(rows[-1][1], rows[-1][0])
+
+    return _show_records_for_listing(rows), next_cursor
+
+def show_calendar(year, month, **filters):
+    """Weeks of the month calendar, Monday first, each day with its shows.
+
+    The grid includes the leading and trailing days of the neighbouring
+    months, and all of it is read with one range query on starttime.
+    Returns a list of weeks, each a list of
+    {'date', 'in_month', 'shows'} dicts.
+    """
+    weeks = calendar.Calendar().monthdatescalendar(year, month)
+    start = datetime.combine(weeks[0][0], time.min)
+    end = datetime.combine(weeks[-1][-1] + timedelta(days=1), time.min)
+
+    rows = _filter_shows(
+        _show_listing(), start=start, end=end, **filters
+    ).order_by(
+        Show.starttime, Show.id
+    ).all()
+
+    by_day = {
+        day: _show_records_for_listing(day_rows)
+        for day, day_rows in groupby(rows, key=lambda row: row[1].date())
+    }
+
+    return [[{
+        'date': day,
+        'in_month': day.month == month,
+        'shows': by_day.get(day, [])
+    } for day in week] for week in weeks]
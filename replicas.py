@@ -0,0 +1,162 @@
+import threading
+import time
+from itertools import count
+
+from flask import has_request_context, request, session
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import create_engine, orm, text
+from sqlalchemy.sql.expression import UpdateBase
+
+from pool import pool_status
+
+#----------------------------------------------------------------------------#
+# Replica pool.
+#----------------------------------------------------------------------------#
+
+class ReplicaPool(object):
+    """Round-robin over read replicas, skipping the ones failing health checks.
+
+    A background thread runs SELECT 1 on every replica each `check_interval`
+    seconds. The thread starts on the first choose(), so it runs in each
+    worker after forking.
+    """
+
+    def __init__(self, urls, engine_options=None, check_interval=10):
+        self.engines = [create_engine(url, **(engine_options or {})) for url in urls]
+        self.check_interval = check_interval
+        self._healthy = list(self.engines)
+        self._turn = count()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def choose(self):
+        """A healthy replica engine, or None to fall back to the primary."""
+        if not self.engines:
+            return None
+        if self._thread is None:
+            self._start()
+        healthy = self._healthy
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    def check(self):
+        healthy = []
+        for engine in self.engines:
+            try:
+                with engine.connect() as connection:
+                    connection.execute(text('SELECT 1'))
+            except Exception:
+                continue
+            healthy.append(engine)
+        self._healthy = healthy
+
+    def status(self):
+        return [dict(
+            pool_status(engine),
+            host=engine.url.host,
+            database=engine.url.database,
+            healthy=engine in self._healthy
+        ) for engine in self.engines]
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                thread = threading.Thread(target=self._run, name='replica-health', daemon=True)
+                thread.start()
+                self._thread = thread
+
+    def _run(self):
+        while True:
+            self.check()
+            time.sleep(self.check_interval)
+
+#----------------------------------------------------------------------------#
+# Routing session.
+#----------------------------------------------------------------------------#
+
+class ReplicaRouting(object):
+    """Session mixin that sends reads of read-only routes to a replica.
+
+    Statements go to a replica only while handling a request for one of
+    READ_REPLICA_ENDPOINTS, outside a flush, and when the client has not
+    written recently. A commit that wrote anything pins the client to the
+    primary for READ_YOUR_WRITES_SECONDS, so the page it is redirected to
+    shows its own change even when the replicas lag. A session reads from
+    one replica until it is closed, so a page never mixes two replicas
+    that lag by different amounts.
+
+    Used by RoutingSession and by the ASGI mode's session (asgi.py). The
+    session sets `app` and `replicas`; replica_bind() maps the engine the
+    pool chose to the bind the session should use.
+    """
+
+    _wrote = False
+    _replica = None
+
+    def replica_bind(self, engine):
+        return engine
+
+    @property
+    def read_from_replica(self):
+        """Whether this session has read from a replica since it was opened."""
+        return self._replica is not None
+
+    def routed_bind(self, clause):
+        """The replica bind for this statement, or None for the primary."""
+        if self._flushing or isinstance(clause, UpdateBase):
+            self._wrote = True
+        elif self._reads_from_replica():
+            if self._replica is None:
+                self._replica = self.replicas.choose()
+            if self._replica is not None:
+                return self.replica_bind(self._replica)
+        return None
+
+    def _reads_from_replica(self):
+        if not self.replicas.engines or not has_request_context():
+            return False
+        if request.endpoint not in self.app.config['READ_REPLICA_ENDPOINTS']:
+            return False
+        return session.get('primary_until', 0) < time.time()
+
+    def commit(self):
+        super(ReplicaRouting, self).commit()
+        if self._wrote and self.replicas.engines and has_request_context():
+            session['primary_until'] = time.time() + self.app.config['READ_YOUR_WRITES_SECONDS']
+        self._wrote = False
+
+    def rollback(self):
+        super(ReplicaRouting, self).rollback()
+        self._wrote = False
+
+    def close(self):
+        super(ReplicaRouting, self).close()
+        self._replica = None
+
+class RoutingSession(ReplicaRouting, SignallingSession):
+    """Flask-SQLAlchemy's session, with ReplicaRouting."""
+
+    def __init__(self, db, **options):
+        self.replicas = db.replicas
+        super(RoutingSession, self).__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        replica = self.routed_bind(clause)
+        if replica is not None:
+            return replica
+        return super(RoutingSession, self).get_bind(mapper, clause)
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """Flask-SQLAlchemy with a pool of read replicas next to the primary."""
+
+    def init_app(self, app):
+        super(RoutingSQLAlchemy, self).init_app(app)
+        self.replicas = ReplicaPool(
+            app.config['SQLALCHEMY_REPLICA_URIS'],
+            app.config.get('SQLALCHEMY_ENGINE_OPTIONS'),
+            app.config['REPLICA_CHECK_INTERVAL']
+        )
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
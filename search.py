@@ -0,0 +1,78 @@
+import re
+
+from sqlalchemy import func, or_
+
+from app import db
+from models import Venue, Artist
+
+#----------------------------------------------------------------------------#
+# Search.
+#----------------------------------------------------------------------------#
+
+# Matches the expression indexed by ix_venue_search_vector/ix_artist_search_vector,
+# so the planner can answer full-text matches from the GIN index.
+def search_vector(model):
+    return func.fyyur_search_vector(model.name, model.city, model.state, model.genres)
+
+def parse_search_term(search_term):
+    """Split a search box value into (terms, city, state).
+
+    "San Francisco, CA" is a location search; anything else is split into
+    word terms that must all match.
+    """
+    if ',' in search_term:
+        city, _, state = search_term.partition(',')
+        return [], city.strip(), state.strip()
+    return re.findall(r'\w+', search_term.lower()), None, None
+
+def _escape_like(value):
+    # Matched with escape='\\', so % and _ in user input are literal.
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def _like_pattern(value):
+    return '%{}%'.format(_escape_like(value))
+
+def search_criteria(model, search_term):
+    """Return (criteria, rank) for a search box value.
+
+    `criteria` is a list of filters matching the term and `rank` an
+    expression to order by, or None for location and empty searches.
+    """
+    terms, city, state = parse_search_term(search_term)
+
+    if city is not None:
+        criteria = [model.city.ilike(_escape_like(city), escape='\\')]
+        if state:
+            criteria.append(model.state.ilike(_escape_like(state), escape='\\'))
+        return criteria, None
+    if terms:
+        vector = search_vector(model)
+        tsquery = func.to_tsquery('simple', ' & '.join('{}:*'.format(term) for term in terms))
+        return [or_(
+            vector.op('@@')(tsquery),
+            model.name.ilike(_like_pattern(search_term.strip()), escape='\\')
+        )], func.ts_rank(vector, tsquery).desc()
+    return [], None
+
+def search_entities(model, search_term, limit, criteria=()):
+    """Ranked search over venues or artists.
+
+    Returns (count, rows) where rows are (id, name, upcoming shows count)
+    tuples, best match first, capped at `limit`. The total count comes from
+    a window over the same statement, so it still reflects every match.
+    `criteria` narrows the search further, e.g. to genres.
+    """
+    search, rank = search_criteria(model, search_term)
+
+    query = db.session.query(
+        model.id, model.name, model.upcoming_shows_count, func.count().over()
+    ).filter(*search).filter(*criteria)
+
+    order_by = [model.name, model.id]
+    if rank is not None:
+        order_by.insert(0, rank)
+
+    rows = query.order_by(*order_by).limit(limit).all()
+
+    count = rows[0][3] if rows else 0
+    return count, [row[:3] for row in rows]
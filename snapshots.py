@@ -0,0 +1,207 @@
+import queue
+import threading
+import time
+from collections import Counter, defaultdict, namedtuple
+from itertools import groupby
+from operator import itemgetter
+
+from app import db
+from models import Venue, Artist
+
+#----------------------------------------------------------------------------#
+# Snapshots.
+#----------------------------------------------------------------------------#
+
+Snapshot = namedtuple('Snapshot', 'version built_at payload')
+
+class ListingSnapshot(object):
+    """A listing's rows, kept by id, and the payload built from them.
+
+    `load(ids=None)` returns rows whose first column is the id, for `ids`
+    or for the whole table; `build(rows)` turns every row into the payload.
+    Only the refresher thread calls rebuild() and refresh(); requests read
+    `current`, which is replaced in one assignment.
+    """
+
+    def __init__(self, load, build):
+        self.load = load
+        self.build = build
+        self.rows = {}
+        self.current = None
+        self.rebuilt_at = None
+
+    def rebuild(self):
+        self.rows = {row[0]: row for row in self.load()}
+        self.rebuilt_at = time.time()
+        return self._publish()
+
+    def refresh(self, ids):
+        found = {row[0]: row for row in self.load(ids)}
+        for entity_id in ids:
+            if entity_id in found:
+                self.rows[entity_id] = found[entity_id]
+            else:
+                self.rows.pop(entity_id, None)
+        return self._publish()
+
+    def _publish(self):
+        """Swap in the new payload; returns whether it differs from the last."""
+        payload = self.build(list(self.rows.values()))
+        current = self.current
+        if current is not None and payload == current.payload:
+            self.current = current._replace(built_at=time.time())
+            return False
+        self.current = Snapshot((current.version if current else 0) + 1, time.time(), payload)
+        return True
+
+class SnapshotRefresher(object):
+    """Keeps a set of ListingSnapshots current from a background thread.
+
+    touch(name, *ids) queues an incremental refresh of just those rows.
+    Each snapshot is also rebuilt in full once its last full rebuild is
+    `max_age` seconds old, which picks up writes made by other processes.
+    `on_change` is called after every refresh asked for through touch() or
+    rebuild(), whether or not it changed a payload, and after a periodic
+    rebuild that changed one. The thread starts on the first get(), touch()
+    or rebuild(), so it runs in each worker after forking, and no queued
+    refresh (nor the page cache bump after it) waits for a listing to be
+    read.
+    """
+
+    def __init__(self, app, snapshots, max_age=300, on_change=None, retry_delay=5):
+        self.app = app
+        self.snapshots = snapshots
+        self.max_age = max_age
+        self.on_change = on_change
+        self.retry_delay = retry_delay
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """The current Snapshot of `name`, or None until the first build."""
+        if self._thread is None:
+            self._start()
+        return self.snapshots[name].current
+
+    def touch(self, name, *ids):
+        if ids:
+            self._put((name, [int(entity_id) for entity_id in ids]))
+
+    def rebuild(self, name=None):
+        self._put((name, None))
+
+    def _put(self, request):
+        if self._thread is None:
+            self._start()
+        self._queue.put(request)
+
+    def status(self):
+        now = time.time()
+        status = {'pending': self._queue.qsize(), 'running': self._thread is not None}
+        for name, snapshot in self.snapshots.items():
+            current = snapshot.current
+            status[name] = {
+                'version': current.version if current else None,
+                'age_seconds': round(now - current.built_at, 3) if current else None,
+                'rows': len(snapshot.rows),
+            }
+        return status
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                thread = threading.Thread(target=self._run, name='listing-snapshots', daemon=True)
+                thread.start()
+                self._thread = thread
+
+    def _next_due(self):
+        rebuilt = [snapshot.rebuilt_at for snapshot in self.snapshots.values()]
+        if None in rebuilt:
+            return 0
+        return max(0, min(rebuilt) + self.max_age - time.time())
+
+    def _run(self):
+        while True:
+            try:
+                requests = [self._queue.get(timeout=self._next_due())]
+            except queue.Empty:
+                requests = []
+            while True:
+                try:
+                    requests.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            with self.app.app_context():
+                try:
+                    changed = self._refresh(requests)
+                except Exception:
+                    self.app.logger.exception('Listing snapshot refresh failed')
+                    changed = False
+                    time.sleep(self.retry_delay)
+                finally:
+                    db.session.remove()
+
+            if (changed or requests) and self.on_change is not None:
+                self.on_change()
+
+    def _refresh(self, requests):
+        full = set()
+        ids = defaultdict(set)
+        for name, entity_ids in requests:
+            if entity_ids is None:
+                full.update([name] if name else self.snapshots)
+            else:
+                ids[name].update(entity_ids)
+
+        changed = False
+        now = time.time()
+        for name, snapshot in self.snapshots.items():
+            if name in full or snapshot.rebuilt_at is None or now - snapshot.rebuilt_at >= self.max_age:
+                changed |= snapshot.rebuild()
+            elif ids.get(name):
+                changed |= snapshot.refresh(ids[name])
+        return changed
+
+#----------------------------------------------------------------------------#
+# Listings.
+#----------------------------------------------------------------------------#
+
+def _genre_counts(rows, genres_column):
+    counts = Counter(genre for row in rows for genre in row[genres_column] or ())
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+
+def load_venue_rows(ids=None):
+    query = db.session.query(
+        Venue.id, Venue.city, Venue.state, Venue.name, Venue.upcoming_shows_count, Venue.genres)
+    if ids is not None:
+        query = query.filter(Venue.id.in_(ids))
+    return query.all()
+
+def build_venue_listing(rows):
+    """(areas, facets) for /venues, shaped like venue_areas() and genre_facets()."""
+    rows = sorted(rows, key=lambda row: (row[1] is None, row[1] or '', row[2] is None, row[2] or '', row[0]))
+    areas = []
+    for (city, state), area_rows in groupby(rows, key=itemgetter(1, 2)):
+        areas.append({
+            "city": city,
+            "state": state,
+            "venues": [{
+                'id': venue_id,
+                'name': name,
+                'num_upcoming_shows': num_upcoming_shows
+            } for venue_id, _, _, name, num_upcoming_shows, _ in area_rows]
+        })
+    return areas, _genre_counts(rows, 5)
+
+def load_artist_rows(ids=None):
+    query = db.session.query(Artist.id, Artist.name, Artist.genres)
+    if ids is not None:
+        query = query.filter(Artist.id.in_(ids))
+    return query.all()
+
+def build_artist_listing(rows):
+    """(artists, facets) for /artists."""
+    artists = [{'id': artist_id, 'name': name} for artist_id, name, _ in sorted(rows, key=itemgetter(0))]
+    return artists, _genre_counts(rows, 2)
@@ -0,0 +1,37 @@
+// Fill the <datalist> of every input[data-autocomplete] with matching names.
+// Each option's value is the id, so picking a name fills the id field.
+(function () {
+  var DELAY = 150;
+
+  function attach(input) {
+    var list = document.getElementById(input.getAttribute('list'));
+    var kind = input.getAttribute('data-autocomplete');
+    var timer = null;
+    var last = null;
+
+    input.addEventListener('input', function () {
+      var q = input.value.trim();
+      clearTimeout(timer);
+      if (!q || /^\d+$/.test(q) || q === last) {
+        return;
+      }
+      timer = setTimeout(function () {
+        last = q;
+        fetch('/api/autocomplete?kind=' + kind + '&q=' + encodeURIComponent(q))
+          .then(function (response) { return response.json(); })
+          .then(function (items) {
+            list.innerHTML = '';
+            items.forEach(function (item) {
+              var option = document.createElement('option');
+              option.value = item.id;
+              option.label = item.name;
+              option.textContent = item.name;
+              list.appendChild(option);
+            });
+          });
+      }, DELAY);
+    });
+  }
+
+  document.querySelectorAll('input[data-autocomplete]').forEach(attach);
+})();
@@ -0,0 +1,104 @@
+"""Fixtures for tests against a real database.
+
+The tests run the app on the PostgreSQL database named by TEST_DATABASE_URL,
+migrated to head and emptied before and after every test. They are skipped
+when it is not set. Never point it at a database whose data you want to keep.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+
+# config.py reads DATABASE_URL when the app is first imported.
+if TEST_DATABASE_URL:
+    os.environ['DATABASE_URL'] = TEST_DATABASE_URL
+
+@pytest.fixture(scope='session')
+def app():
+    if not TEST_DATABASE_URL:
+        pytest.skip('TEST_DATABASE_URL is not set')
+
+    from flask_migrate import upgrade
+    from app import app
+
+    app.config['TESTING'] = True
+    with app.app_context():
+        upgrade(directory=os.path.join(ROOT, 'migrations'))
+    return app
+
+def _empty(app):
+    import app as fyyur
+    from sqlalchemy import text
+
+    with app.app_context():
+        fyyur.db.session.execute(text('TRUNCATE show, venue, artist RESTART IDENTITY CASCADE'))
+        fyyur.db.session.commit()
+    fyyur.cache.clear()
+    fyyur.page_cache.bump()
+    fyyur.listing_snapshots.rebuild()
+
+@pytest.fixture
+def db(app):
+    """The app's db on an empty database.
+
+    No app context is left pushed, so every test client request gets its
+    own session, as it would when served.
+    """
+    import app as fyyur
+
+    _empty(app)
+    yield fyyur.db
+    _empty(app)
+
+@pytest.fixture
+def seed(app, db):
+    """seed(venues, artists, shows) adds rows from benchmarks.generator."""
+    import app as fyyur
+    from benchmarks.generator import seed as seed_data
+
+    def seed(venues, artists, shows):
+        with app.app_context():
+            seed_data(db, venues, artists, shows)
+        fyyur.cache.clear()
+        fyyur.page_cache.bump()
+
+    return seed
+
+@pytest.fixture
+def no_snapshots(monkeypatch):
+    """Read /venues and /artists from the database, not the listing snapshots."""
+    import app as fyyur
+
+    monkeypatch.setattr(fyyur.listing_snapshots, 'get', lambda name: None)
+
+@pytest.fixture
+def count_queries(app):
+    """count_queries() collects the statements this thread sends while open.
+
+    Statements from the app's background threads (snapshots, health
+    checks) are left out.
+    """
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    @contextmanager
+    def count_queries():
+        thread = threading.get_ident()
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if threading.get_ident() == thread:
+                statements.append(statement)
+
+        event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(Engine, 'before_cursor_execute', before_cursor_execute)
+
+    return count_queries
@@ -0,0 +1,9 @@
+"""JSON API input handling."""
+import pytest
+
+@pytest.mark.parametrize('body', [[1, 2], 5, 'show'])
+def test_book_show_rejects_a_body_that_is_not_an_object(app, db, body):
+    response = app.test_client().post('/api/v1/shows', json=body)
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'body must be a JSON object'}
@@ -0,0 +1,43 @@
+"""The ASGI entry point, driven in-process through httpx."""
+import asyncio
+
+def _get(*paths):
+    """GET `paths` concurrently from asgi.application; returns the responses."""
+    import httpx
+    from asgi import application
+
+    async def get_all():
+        transport = httpx.ASGITransport(app=application)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url='http://fyyur.test') as client:
+                return await asyncio.gather(*[client.get(path) for path in paths])
+        finally:
+            # The asyncpg connections belong to this event loop.
+            for engine in [application.engine] + application.replica_engines:
+                await engine.dispose()
+
+    return asyncio.run(get_all())
+
+def test_async_route_matches_wsgi(app, seed):
+    seed(venues=10, artists=10, shows=40)
+    path = '/api/v1/venues?fields=name&limit=5'
+
+    response, = _get(path)
+
+    assert response.status_code == 200
+    assert response.json() == app.test_client().get(path).get_json()
+
+def test_concurrent_async_requests(app, seed):
+    seed(venues=10, artists=10, shows=40)
+
+    responses = _get(*['/api/v1/shows?cursor={}'.format(cursor) for cursor in range(10)])
+
+    assert [response.status_code for response in responses] == [200] * 10
+
+def test_other_routes_go_through_wsgi(app, seed, no_snapshots):
+    seed(venues=10, artists=10, shows=40)
+
+    response, = _get('/venues')
+
+    assert response.status_code == 200
+    assert 'text/html' in response.headers['content-type']
@@ -0,0 +1,47 @@
+"""The bundles are rebuilt at startup whenever the built ones are out of date."""
+import os
+
+import pytest
+
+BUNDLES = {'site.css': ['css/site.css']}
+
+@pytest.fixture
+def assets():
+    return pytest.importorskip('assets')
+
+@pytest.fixture
+def static(tmp_path):
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'css' / 'site.css').write_text('a :hover { color : red; }')
+    (tmp_path / 'css' / 'extra.css').write_text('p { margin : 0; }')
+    return str(tmp_path)
+
+def _init(assets, static, bundles):
+    from flask import Flask
+
+    return assets.Assets(Flask(__name__, static_folder=static), bundles)
+
+def test_new_bundle_is_built(assets, static):
+    assets.build(static, BUNDLES)
+
+    built = _init(assets, static, dict(BUNDLES, **{'extra.css': ['css/extra.css']}))
+
+    assert set(built.manifest) == {'site.css', 'extra.css'}
+
+def test_changed_source_is_rebuilt(assets, static):
+    before = assets.build(static, BUNDLES)
+    source = os.path.join(static, 'css', 'site.css')
+    with open(source, 'w') as stream:
+        stream.write('a { color: blue; }')
+    later = os.path.getmtime(os.path.join(static, 'dist', 'manifest.json')) + 10
+    os.utime(source, (later, later))
+
+    built = _init(assets, static, BUNDLES)
+
+    assert built.manifest['site.css'] != before['site.css']
+
+def test_current_manifest_is_kept(assets, static):
+    before = assets.build(static, BUNDLES)
+
+    assert not assets._stale(static, BUNDLES)
+    assert _init(assets, static, BUNDLES).manifest == before
@@ -0,0 +1,16 @@
+"""Read routes must have an index for every table they filter."""
+
+def test_no_unexpected_seq_scans(app, db, seed, no_snapshots):
+    from app import plan_check_routes
+    from explain import check_route_plans
+
+    seed(venues=50, artists=50, shows=200)
+    with app.app_context():
+        routes = plan_check_routes()
+        engine = db.engine
+
+    # The seeded tables are small enough that the planner would rather scan
+    # them; with seq scans disabled it still scans where no index serves.
+    failures = check_route_plans(app, engine, routes, enable_seqscan=False)
+
+    assert failures == []
@@ -0,0 +1,33 @@
+"""Every connection must go back to the pool once the requests are done."""
+import time
+
+import pytest
+
+from benchmarks.runner import run
+
+def _checked_out(app, db):
+    from pool import pool_status
+
+    with app.app_context():
+        return pool_status(db.engine).get('checkedout')
+
+def test_no_leaks_after_concurrent_writes(app, db, seed):
+    strict_loading = app.config['STRICT_LOADING']
+    seed(venues=10, artists=10, shows=50)
+
+    results = run(app, db, requests=5, concurrency=4, writes=True)
+
+    # run() turns STRICT_LOADING on only while it runs.
+    assert app.config['STRICT_LOADING'] == strict_loading
+
+    errors = {name: stats['errors'] for name, stats in results.items()
+              if not name.startswith('_') and stats['errors']}
+    assert not errors
+    if 'checkedout' not in results['_pool']:
+        pytest.skip('NullPool (DB_PGBOUNCER) keeps no connections to count')
+
+    # The snapshot refresher may still hold one for a moment.
+    deadline = time.monotonic() + 5
+    while _checked_out(app, db) and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert _checked_out(app, db) == 0
@@ -0,0 +1,46 @@
+"""Statements per request must not grow with the number of rows."""
+from benchmarks.runner import QUERY_BUDGETS
+
+def _statements(client, count_queries, method, path, data=None):
+    with count_queries() as statements:
+        response = client.open(path, method=method, data=data)
+    assert response.status_code == 200
+    return len(statements)
+
+def test_venue_listing(app, seed, count_queries, no_snapshots):
+    client = app.test_client()
+
+    seed(venues=20, artists=20, shows=100)
+    small = _statements(client, count_queries, 'GET', '/venues')
+
+    seed(venues=180, artists=20, shows=900)
+    large = _statements(client, count_queries, 'GET', '/venues')
+
+    assert small == large
+    assert large <= QUERY_BUDGETS['venues']
+
+SEARCHES = [
+    ('search_venues', '/venues/search', 'blue'),
+    ('search_venues', '/venues/search', 'Austin, TX'),
+    ('search_artists', '/artists/search', 'wolves'),
+    ('search_artists', '/artists/search', 'Seattle, WA'),
+]
+
+def test_search(app, seed, count_queries):
+    client = app.test_client()
+
+    def run():
+        return [
+            _statements(client, count_queries, 'POST', path, {'search_term': term})
+            for _, path, term in SEARCHES
+        ]
+
+    seed(venues=20, artists=20, shows=100)
+    small = run()
+
+    seed(venues=180, artists=180, shows=900)
+    large = run()
+
+    assert small == large
+    for (name, _, _), statements in zip(SEARCHES, large):
+        assert statements <= QUERY_BUDGETS[name]
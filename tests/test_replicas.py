@@ -0,0 +1,135 @@
+"""Read routing between the primary and a replica.
+
+TEST_REPLICA_DATABASE_URL names a second, empty database standing in for
+the replica. Nothing replicates into it: each test writes a venue of the
+same id but a different name to both, so a page shows where it was read.
+"""
+import os
+
+import pytest
+
+TEST_REPLICA_DATABASE_URL = os.environ.get('TEST_REPLICA_DATABASE_URL')
+
+RENAME = {
+    'name': 'Renamed Hall', 'genres': 'Jazz', 'address': '1 Main St', 'city': 'Austin',
+    'state': 'TX', 'phone': '', 'website_link': '', 'facebook_link': '',
+    'seeking_description': '', 'image_link': '',
+}
+
+def _add_venue(engine, name):
+    from sqlalchemy.orm import Session
+    from models import Venue
+
+    with Session(bind=engine) as session:
+        session.add(Venue(name=name, city='Austin', state='TX', address='1 Main St', genres=['Jazz']))
+        session.commit()
+
+def _venue_name(engine):
+    from sqlalchemy import text
+
+    with engine.connect() as connection:
+        return connection.execute(text('SELECT name FROM venue WHERE id = 1')).scalar()
+
+@pytest.fixture(scope='session')
+def replica_engine(app):
+    if not TEST_REPLICA_DATABASE_URL:
+        pytest.skip('TEST_REPLICA_DATABASE_URL is not set')
+    import app as fyyur
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(TEST_REPLICA_DATABASE_URL)
+    with engine.begin() as connection:
+        connection.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+    fyyur.db.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def use_replicas(app, db, replica_engine, no_snapshots, monkeypatch):
+    """use_replicas(*urls) routes the app's reads to a ReplicaPool of `urls`."""
+    import app as fyyur
+    from sqlalchemy import text
+    from replicas import ReplicaPool
+
+    def empty():
+        with replica_engine.begin() as connection:
+            connection.execute(text('TRUNCATE show, venue, artist RESTART IDENTITY CASCADE'))
+
+    pools = []
+
+    def use_replicas(*urls):
+        pool = ReplicaPool(urls, app.config.get('SQLALCHEMY_ENGINE_OPTIONS'), check_interval=3600)
+        pools.append(pool)
+        monkeypatch.setattr(db, 'replicas', pool)
+        # Sessions take the pool when they are created.
+        db.session.remove()
+        return pool
+
+    empty()
+    _add_venue(db.get_engine(app), 'Primary Hall')
+    _add_venue(replica_engine, 'Replica Hall')
+    fyyur.cache.clear()
+    fyyur.page_cache.bump()
+    yield use_replicas
+    db.session.remove()
+    for pool in pools:
+        for engine in pool.engines:
+            engine.dispose()
+    empty()
+
+def test_reads_from_replica(app, use_replicas):
+    use_replicas(TEST_REPLICA_DATABASE_URL)
+    client = app.test_client()
+
+    assert b'Replica Hall' in client.get('/venues').data
+    assert b'Replica Hall' in client.get('/venues/1').data
+
+def test_writes_go_to_primary_and_are_read_back(app, db, replica_engine, use_replicas, monkeypatch):
+    use_replicas(TEST_REPLICA_DATABASE_URL)
+    client = app.test_client()
+
+    monkeypatch.setitem(app.config, 'READ_YOUR_WRITES_SECONDS', 60)
+    response = client.post('/venues/1/edit', data=RENAME, follow_redirects=True)
+    assert b'Renamed Hall' in response.data
+    assert _venue_name(db.get_engine(app)) == 'Renamed Hall'
+    assert _venue_name(replica_engine) == 'Replica Hall'
+
+    monkeypatch.setitem(app.config, 'READ_YOUR_WRITES_SECONDS', 0)
+    client.post('/venues/1/edit', data=RENAME)
+    assert b'Replica Hall' in client.get('/venues/1').data
+
+def test_lagging_replica_read_is_not_cached(app, use_replicas, monkeypatch):
+    import app as fyyur
+
+    use_replicas(TEST_REPLICA_DATABASE_URL)
+    writer = app.test_client()
+    reader = app.test_client()
+    monkeypatch.setitem(app.config, 'READ_YOUR_WRITES_SECONDS', 60)
+
+    writer.post('/venues/1/edit', data=RENAME)
+    # The reader is not pinned to the primary and sees the lagging replica...
+    assert b'Replica Hall' in reader.get('/venues/1').data
+    assert fyyur.cache.get(fyyur.venue_cache_key(1)) is None
+    # ...which must not hide the write from the writer.
+    assert b'Renamed Hall' in writer.get('/venues/1').data
+
+def test_one_replica_per_session(app, db, use_replicas):
+    from sqlalchemy import select
+    from models import Venue
+
+    pool = use_replicas(TEST_REPLICA_DATABASE_URL, TEST_REPLICA_DATABASE_URL)
+
+    with app.test_request_context('/venues'):
+        binds = {db.session.get_bind(clause=select(Venue.id)) for _ in range(4)}
+        assert len(binds) == 1
+        assert binds <= set(pool.engines)
+
+        db.session.close()
+        assert db.session.get_bind(clause=select(Venue.id)) not in binds
+
+def test_unhealthy_replica_falls_back_to_primary(app, use_replicas):
+    pool = use_replicas('postgresql://fyyur@127.0.0.1:1/unreachable')
+    pool.check()
+    client = app.test_client()
+
+    assert b'Primary Hall' in client.get('/venues/1').data
@@ -0,0 +1,29 @@
+"""Writes reach the cached pages once the listing snapshots are refreshed."""
+import time
+
+def _wait_for(client, path, text, seconds=5):
+    deadline = time.monotonic() + seconds
+    while True:
+        data = client.get(path).get_data(as_text=True)
+        if text in data or time.monotonic() >= deadline:
+            return data
+        time.sleep(0.1)
+
+def test_booked_show_appears_on_cached_shows_page(app, seed):
+    import app as fyyur
+    from models import Artist, Venue
+
+    seed(venues=1, artists=1, shows=0)
+    with app.app_context():
+        venue_id = Venue.query.one().id
+        artist_id = Artist.query.one().id
+    reader = app.test_client()
+    assert '2099' not in reader.get('/shows').get_data(as_text=True)
+
+    response = app.test_client().post('/shows/create', data={
+        'venue_id': venue_id, 'artist_id': artist_id, 'start_time': '2099-01-01 20:00:00'
+    })
+
+    assert response.status_code == 200
+    assert fyyur.listing_snapshots._thread is not None
+    assert '2099' in _wait_for(reader, '/shows', '2099')
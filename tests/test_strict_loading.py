@@ -0,0 +1,82 @@
+"""Every route renders with STRICT_LOADING on, so no view lazy loads."""
+import pytest
+
+def _ids(app, model):
+    with app.app_context():
+        return [row.id for row in model.query.order_by(model.id).limit(2)]
+
+@pytest.fixture
+def client(app, seed, no_snapshots, monkeypatch):
+    monkeypatch.setitem(app.config, 'STRICT_LOADING', True)
+    seed(venues=10, artists=10, shows=40)
+    return app.test_client()
+
+def test_read_routes(app, client):
+    from models import Artist, Venue
+
+    venue_id = _ids(app, Venue)[0]
+    artist_id = _ids(app, Artist)[0]
+    paths = [
+        '/',
+        '/venues',
+        '/venues?genre=Jazz',
+        '/artists',
+        '/shows',
+        '/shows?city=austin',
+        '/shows/calendar',
+        '/venues/create',
+        '/artists/create',
+        '/shows/create',
+        '/venues/{}'.format(venue_id),
+        '/venues/{}/edit'.format(venue_id),
+        '/artists/{}'.format(artist_id),
+        '/artists/{}/edit'.format(artist_id),
+    ]
+    for path in paths:
+        assert client.get(path).status_code == 200, path
+
+    for path in ('/venues/search', '/artists/search'):
+        assert client.post(path, data={'search_term': 'a'}).status_code == 200, path
+
+def test_delete_routes(app, client):
+    from models import Artist, Venue
+
+    venue_id = _ids(app, Venue)[0]
+    artist_id = _ids(app, Artist)[0]
+
+    assert client.post('/venues/{}/delete'.format(venue_id)).status_code == 200
+    assert client.delete('/artist/{}'.format(artist_id)).status_code == 200
+
+    # The delete views flash an error instead of raising, so check the rows went.
+    assert venue_id not in _ids(app, Venue)
+    assert artist_id not in _ids(app, Artist)
+
+def _names(app, model):
+    with app.app_context():
+        return {name for name, in model.query.with_entities(model.name)}
+
+def test_write_routes(app, client):
+    from benchmarks.runner import ARTIST_FORM, VENUE_FORM
+    from models import Artist, Show, Venue
+
+    venue_id = _ids(app, Venue)[0]
+    artist_id = _ids(app, Artist)[0]
+    with app.app_context():
+        shows = Show.query.count()
+
+    # The write views flash an error instead of raising, so check the rows.
+    assert client.post('/venues/create', data=dict(VENUE_FORM, name='Strict venue')).status_code == 200
+    assert client.post('/artists/create', data=dict(ARTIST_FORM, name='Strict artist')).status_code == 200
+    assert 'Strict venue' in _names(app, Venue)
+    assert 'Strict artist' in _names(app, Artist)
+
+    assert client.post('/venues/{}/edit'.format(venue_id), data=dict(VENUE_FORM, name='Edited venue')).status_code == 302
+    assert client.post('/artists/{}/edit'.format(artist_id), data=dict(ARTIST_FORM, name='Edited artist')).status_code == 302
+    assert 'Edited venue' in _names(app, Venue)
+    assert 'Edited artist' in _names(app, Artist)
+
+    assert client.post('/shows/create', data={
+        'venue_id': venue_id, 'artist_id': artist_id, 'start_time': '2099-01-01 20:00:00'
+    }).status_code == 200
+    with app.app_context():
+        assert Show.query.count() == shows + 1